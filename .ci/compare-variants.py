@@ -0,0 +1,183 @@
+"""
+A/B comparison of boost package variants on the host.
+
+Every variant (a set of boost options) is created with the test_package benchmarks enabled, the results are printed
+side by side (median and 95% confidence interval of the median over the repetitions) and compared with a reference:
+the stored baseline when given, the first variant otherwise. The script exits with 1 when a variant is slower than the
+reference by more than the threshold and the confidence intervals do not overlap.
+
+    python .ci/compare-variants.py --reference boost/1.75.0@user/testing --variants variants.json \
+        --baseline baseline.json --threshold 5
+    python .ci/compare-variants.py --reference boost/1.75.0@user/testing --save-baseline baseline.json
+
+variants.json maps a variant name to its options, e.g. {"default": {}, "lto": {"boost:lto": "full"}}
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+
+
+DEFAULT_VARIANTS = {
+    "default": {},
+    "O3": {"boost:extra_b2_flags": "cxxflags=-O3"},
+    "lto": {"boost:lto": "full"},
+    "visibility-global": {"boost:visibility": "global"},
+    "segmented-stacks": {"boost:segmented_stacks": "True"},
+}
+
+
+def create_variant(name, options, args):
+    """
+    Creates the package for a variant with the benchmarks enabled, returns the test_package benchmark results and
+    library sizes
+    """
+    test_folder = os.path.abspath(os.path.join(args.work_dir, name))
+    command = ["conan", "create", ".", args.reference, "--test-build-folder", test_folder,
+               "-e", "BOOST_BENCHMARK=1",
+               "-e", "BOOST_BENCHMARK_REPETITIONS=%d" % args.repetitions,
+               "-e", "BOOST_BENCHMARK_MIN_TIME=%s" % args.min_time]
+    if args.profile:
+        command.extend(["-pr", args.profile])
+    for option, value in sorted(options.items()):
+        command.extend(["-o", "%s=%s" % (option, value)])
+
+    print("Variant %s: %s" % (name, " ".join(command)))
+    subprocess.check_call(command)
+    with open(os.path.join(test_folder, "benchmark_results.json")) as f:
+        results = json.load(f)
+    # Only written when test_package measured the libraries, e.g. not for header only variants
+    sizes = {}
+    sizes_file = os.path.join(test_folder, "library_sizes.json")
+    if os.path.isfile(sizes_file):
+        with open(sizes_file) as f:
+            sizes = json.load(f)
+    return results, sizes
+
+
+def summarize(results):
+    """
+    benchmark name -> median, 95% confidence interval of the median and the samples of the real time
+    """
+    samples = {}
+    for benchmark in results["benchmarks"]:
+        samples.setdefault(benchmark["run_name"], []).append(benchmark["real_time"])
+
+    summary = {}
+    for name, values in samples.items():
+        values = sorted(values)
+        n = len(values)
+        median = values[n // 2] if n % 2 else (values[n // 2 - 1] + values[n // 2]) / 2
+        # Distribution-free interval from the order statistics (normal approximation of the binomial)
+        low = max(0, int(math.floor(n / 2 - 1.96 * math.sqrt(n) / 2)))
+        high = min(n - 1, int(math.ceil(n / 2 + 1.96 * math.sqrt(n) / 2)))
+        summary[name] = {"median": median, "ci": [values[low], values[high]], "samples": values}
+    return summary
+
+
+def compare(variant, reference, threshold):
+    """
+    Relative change of the median and whether it is a significant regression
+    """
+    change = (variant["median"] - reference["median"]) / reference["median"] * 100
+    regression = change > threshold and variant["ci"][0] > reference["ci"][1]
+    return change, regression
+
+
+def print_table(summaries, reference, threshold):
+    names = sorted(set(name for summary in summaries.values() for name in summary))
+    variants = list(summaries)
+    width = max([len(name) for name in names] + [len("benchmark")])
+
+    print("")
+    print("%-*s  %s" % (width, "benchmark", "  ".join("%-38s" % v for v in variants)))
+    regressions = []
+    for name in names:
+        cells = []
+        for variant in variants:
+            result = summaries[variant].get(name)
+            if result is None:
+                cells.append("%-38s" % "-")
+                continue
+            cell = "%.1f ns [%.1f, %.1f]" % (result["median"], result["ci"][0], result["ci"][1])
+            if name in reference:
+                change, regression = compare(result, reference[name], threshold)
+                cell += " %+.1f%%%s" % (change, " !" if regression else "")
+                if regression:
+                    regressions.append((variant, name, change))
+            cells.append("%-38s" % cell)
+        print("%-*s  %s" % (width, name, "  ".join(cells)))
+    print("")
+    return regressions
+
+
+def print_sizes(sizes, reference):
+    """
+    Total size of the boost libraries of every variant, compared with the reference variant
+    """
+    print("%-20s  %s" % ("variant", "library size"))
+    reference_total = sum(sizes[reference].values())
+    for variant, variant_sizes in sizes.items():
+        if not variant_sizes:
+            print("%-20s  -" % variant)
+            continue
+        total = sum(variant_sizes.values())
+        if reference_total:
+            print("%-20s  %d bytes %+.1f%%" % (variant, total, (total - reference_total) * 100.0 / reference_total))
+        else:
+            print("%-20s  %d bytes" % (variant, total))
+    print("")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", help="JSON file mapping variant names to boost options")
+    parser.add_argument("--profile", help="Conan profile of the host, the default profile otherwise")
+    parser.add_argument("--reference", required=True,
+                        help="Full reference of the package to create, e.g. boost/1.75.0@user/testing")
+    parser.add_argument("--baseline", help="Stored baseline JSON to compare with, the first variant otherwise")
+    parser.add_argument("--save-baseline", help="Store the summary of the first variant as the new baseline")
+    parser.add_argument("--threshold", type=float, default=5.0, help="Allowed slowdown in percent (default: 5)")
+    parser.add_argument("--repetitions", type=int, default=10)
+    parser.add_argument("--min-time", default="0.5")
+    parser.add_argument("--work-dir", default="build-variants", help="Where the test_package builds are kept")
+    parser.add_argument("--output", default="build-variants/summaries.json", help="Summaries of all the variants")
+    args = parser.parse_args()
+
+    variants = DEFAULT_VARIANTS
+    if args.variants:
+        with open(args.variants) as f:
+            variants = json.load(f)
+
+    summaries = {}
+    sizes = {}
+    for name in variants:
+        results, sizes[name] = create_variant(name, variants[name], args)
+        summaries[name] = summarize(results)
+
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(summaries, f, indent=2)
+
+    first = summaries[next(iter(variants))]
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(first, f, indent=2)
+
+    reference = first
+    if args.baseline:
+        with open(args.baseline) as f:
+            reference = json.load(f)
+
+    regressions = print_table(summaries, reference, args.threshold)
+    print_sizes(sizes, next(iter(variants)))
+    for variant, name, change in regressions:
+        print("REGRESSION: %s is %.1f%% slower in %s" % (name, change, variant))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,23 @@
 from conans import ConanFile
 from conans import tools
+from conans.errors import ConanException, ConanInvalidConfiguration
 from conans.tools import Version, cppstd_flag
 
+from collections import OrderedDict
+from contextlib import contextmanager
+import cProfile
+import hashlib
+import io
+import json
 import os
+import platform
+import pstats
+import re
 import shutil
+import subprocess
+import sys
+import tarfile
+import time
 
 # NOTE: Adapted from the conan-center recipe
 # https://github.com/conan-io/conan-center-index/tree/master/recipes/boost
@@ -21,6 +35,135 @@ LIB_LIST = ['math', 'wave', 'container', 'contract', 'exception', 'graph', 'iost
             'atomic', 'filesystem', 'system', 'graph_parallel', 'python',
             'stacktrace', 'test', 'type_erasure']
 
+# CPU micro-architecture levels of the cpu_target option and the architectures they apply to
+CPU_TARGETS = {
+    'x86-64-v2': ['x86_64'],
+    'x86-64-v3': ['x86_64'],
+    'x86-64-v4': ['x86_64'],
+    'armv8.1-a': ['armv8', 'armv8.3'],
+    'armv8.2-a': ['armv8', 'armv8.3'],
+    'armv8.4-a': ['armv8', 'armv8.3'],
+}
+# First compiler versions knowing the x86-64 micro-architecture levels in -march
+CPU_LEVEL_MIN_COMPILER = {'gcc': '11', 'clang': '12', 'apple-clang': '13'}
+
+# Optional Boost.Log features, each one can be disabled with its log_<feature> option
+LOG_FEATURES = {
+    'wchar_t': 'BOOST_LOG_WITHOUT_WCHAR_T',
+    'settings_parsers': 'BOOST_LOG_WITHOUT_SETTINGS_PARSERS',
+    'default_factories': 'BOOST_LOG_WITHOUT_DEFAULT_FACTORIES',
+    'syslog': 'BOOST_LOG_WITHOUT_SYSLOG',
+    'event_log': 'BOOST_LOG_WITHOUT_EVENT_LOG',
+    'debug_output': 'BOOST_LOG_WITHOUT_DEBUG_OUTPUT',
+    'ipc': 'BOOST_LOG_WITHOUT_IPC',
+    'asio': 'BOOST_LOG_WITHOUT_ASIO',
+}
+
+# Compiler wrapper recording the wall time of every compile and link step run by b2, see the build_timing option
+BUILD_TIMER_SCRIPT = '''import json
+import os
+import subprocess
+import sys
+import time
+
+args = sys.argv[1:]
+start = time.time()
+returncode = subprocess.call(args)
+end = time.time()
+
+output = None
+for i, arg in enumerate(args):
+    if arg == "-o" and i + 1 < len(args):
+        output = args[i + 1]
+    elif arg.startswith("/Fo") or arg.startswith("-Fo"):
+        output = arg[3:]
+sources = [arg for arg in args if os.path.splitext(arg)[1].lower() in [".c", ".cc", ".cpp", ".cxx", ".s", ".asm"]]
+record = {"kind": "compile" if "-c" in args or "/c" in args else "link",
+          "sources": sources, "output": output, "start": start, "end": end, "returncode": returncode}
+with open(os.environ["BOOST_BUILD_TIMING_LOG"], "a") as log:
+    log.write(json.dumps(record) + "\\n")
+sys.exit(returncode)
+'''
+
+# Estimated peak memory of a compile job, in MB, for the memory aware job scheduling. The heavy libraries instantiate
+# Spirit grammars and huge template sets, they are built in a second b2 pass with fewer jobs
+JOB_MEMORY_MB = 1024
+HEAVY_JOB_MEMORY_MB = 3072
+HEAVY_LIBRARIES = ['log', 'wave', 'math']
+
+# Parts of the source archive the build never reads: the tests and the documentation of the libraries and the top level
+# documentation. libs/config/test is kept, the configuration checks of b2 include its .ipp files
+SOURCE_SKIPPED_PATHS = re.compile(r"^[^/]+/(doc|libs/(?!config/test(/|$))(numeric/)?[^/]+/(test|doc))(/|$)")
+
+# Unity build: sources amalgamated per translation unit, and the libraries whose sources clash once amalgamated (same
+# named helpers in anonymous namespaces, file local macros)
+UNITY_BATCH_SIZE = 8
+UNITY_SKIPPED_LIBRARIES = ['locale', 'log', 'math']
+UNITY_COMPILE_COMMAND = re.compile(r'-c -o "([^"]+)" "([^"]+\.(?:cpp|cxx|cc))"')
+UNITY_LINK_OUTPUT = re.compile(r'\.(a|so(\.[0-9.]+)?|dylib)$')
+
+# Number of libraries and translation units listed in the build timing summary
+BUILD_TIMING_TOP = 10
+
+# Recipe phases timed with BOOST_RECIPE_PROFILE=timing|cprofile. Module level, so the source, build, package and
+# package_info steps of a conan create, which run in the same process, end up in the same report
+RECIPE_PROFILE = {"phases": [], "report_folder": None}
+RECIPE_PROFILE_TOP = 15
+
+# The heaviest umbrella headers, precompiled by default with the precompiled_headers option
+PCH_HEADERS = ['boost/asio.hpp', 'boost/spirit/home/x3.hpp', 'boost/log/trivial.hpp', 'boost/beast.hpp']
+
+# Compiled libraries each packaged library depends on, keyed by the library name without the "boost_" prefix and the
+# layout tags. Adapted from the 1.75.0 dependencies of the conan-center recipe
+LIB_DEPENDENCIES = {
+    'atomic': [],
+    'chrono': ['system'],
+    'container': [],
+    'context': [],
+    'contract': ['exception', 'thread'],
+    'coroutine': ['context', 'exception', 'system'],
+    'date_time': [],
+    'exception': [],
+    'fiber': ['context', 'filesystem'],
+    'fiber_numa': ['fiber'],
+    'filesystem': ['system'],
+    'graph': ['regex', 'serialization'],
+    'graph_parallel': ['filesystem', 'graph', 'mpi', 'random', 'serialization'],
+    'iostreams': ['random', 'regex'],
+    'json': ['container', 'system'],
+    'locale': ['thread'],
+    'log': ['atomic', 'container', 'date_time', 'exception', 'filesystem', 'random', 'regex', 'system', 'thread'],
+    'log_setup': ['log'],
+    'math_c99': [],
+    'math_c99f': [],
+    'math_c99l': [],
+    'math_tr1': [],
+    'math_tr1f': [],
+    'math_tr1l': [],
+    'mpi': ['graph', 'serialization'],
+    'mpi_python': ['mpi', 'python'],
+    'nowide': ['filesystem'],
+    'numpy': ['python'],
+    'program_options': [],
+    'python': [],
+    'random': ['system'],
+    'regex': [],
+    'serialization': [],
+    'stacktrace_addr2line': [],
+    'stacktrace_backtrace': [],
+    'stacktrace_basic': [],
+    'stacktrace_noop': [],
+    'stacktrace_windbg': [],
+    'stacktrace_windbg_cached': [],
+    'system': [],
+    'thread': ['atomic', 'chrono', 'container', 'date_time', 'exception', 'system'],
+    'timer': ['chrono', 'system'],
+    'type_erasure': ['thread'],
+    'unit_test_framework': ['exception'],
+    'wave': ['filesystem', 'serialization'],
+    'wserialization': ['serialization'],
+}
+
 
 class BoostConan(ConanFile):
     name = 'boost'
@@ -46,7 +189,35 @@ class BoostConan(ConanFile):
         'debug_level': [i for i in range(0, 14)],
         'extra_b2_flags': 'ANY',
         'visibility': ['global', 'protected', 'hidden'],
+        'compiler_launcher': ['none', 'ccache', 'sccache'],  # sccache hits are limited to the same package folder
+        'b2_cache': ['off', 'on', 'refresh'],
+        'incremental': [True, False],
+        'lto': ['off', 'full', 'thin'],
+        'pgo': [True, False],
+        'header_subset': 'ANY',  # the headers of the without_* libraries are pruned as well
+        'precompiled_headers': [True, False],
+        'precompiled_headers_list': 'ANY',
+        'build_timing': [True, False],
+        'cpu_target': ['generic', 'native'] + list(CPU_TARGETS),
+        'multi_config': ['none', 'build_type', 'build_type_link'],
+        'build_jobs': ['cpu', 'memory'],
+        'job_memory': 'ANY',
+        'heavy_job_memory': 'ANY',
+        'unity_build': [True, False],
+        'unity_batch_size': 'ANY',
+        'unity_skip': 'ANY',
+        'debug_info': ['embedded', 'split', 'separate'],
+        'linker': ['default', 'gold', 'lld', 'mold'],
+        'gc_sections': [True, False],
+        'icf': [True, False],
+        'context_impl': ['default', 'fcontext', 'ucontext', 'winfib'],
+        'context_stack_allocator': ['fixedsize', 'protected', 'pooled'],
+        'context_valgrind': [True, False],
+        'iostreams_lzma': [True, False],
+        'iostreams_zstd': [True, False],
+        'stacktrace_backend': ['default', 'noop', 'backtrace', 'addr2line', 'basic'],
     }
+    options.update({"log_%s" % feature: [True, False] for feature in LOG_FEATURES})
     options.update({"without_%s" % libname: [True, False] for libname in LIB_LIST})
 
     default_options = {
@@ -64,7 +235,35 @@ class BoostConan(ConanFile):
         'debug_level': 0,
         'extra_b2_flags': 'None',
         'visibility': 'hidden',
+        'compiler_launcher': 'none',
+        'b2_cache': 'on',
+        'incremental': False,
+        'lto': 'off',
+        'pgo': False,
+        'header_subset': 'None',
+        'precompiled_headers': False,
+        'precompiled_headers_list': 'None',
+        'build_timing': False,
+        'cpu_target': 'generic',
+        'multi_config': 'none',
+        'build_jobs': 'cpu',
+        'job_memory': 'None',
+        'heavy_job_memory': 'None',
+        'unity_build': False,
+        'unity_batch_size': 'None',
+        'unity_skip': 'None',
+        'debug_info': 'embedded',
+        'linker': 'default',
+        'gc_sections': False,
+        'icf': False,
+        'context_impl': 'default',
+        'context_stack_allocator': 'fixedsize',
+        'context_valgrind': False,
+        'iostreams_lzma': False,
+        'iostreams_zstd': False,
+        'stacktrace_backend': 'default',
     }
+    default_options.update({"log_%s" % feature: True for feature in LOG_FEATURES})
 
     for x in LIB_LIST:
         if x != 'python':
@@ -76,7 +275,8 @@ class BoostConan(ConanFile):
 
     short_paths = True
     no_copy_source = True
-    exports_sources = ['patches/*']
+    # The test_package sources are the default PGO training corpus
+    exports_sources = ['patches/*', 'test_package/*.cpp', 'test_package/include/*']
     build_policy = 'missing'
 
     @property
@@ -103,6 +303,21 @@ class BoostConan(ConanFile):
     def _zip_bzip2_requires_needed(self):
         return not self.options.without_iostreams and not self.options.header_only
 
+    @property
+    def _iostreams_dependencies(self):
+        """
+        Compression libraries of the Boost.Iostreams filters: package name -> b2 module
+        """
+        dependencies = OrderedDict()
+        if self._zip_bzip2_requires_needed:
+            dependencies['zlib'] = 'zlib'
+            dependencies['bzip2'] = 'bzip2'
+            if self.options.iostreams_lzma:
+                dependencies['xz_utils'] = 'lzma'
+            if self.options.iostreams_zstd:
+                dependencies['zstd'] = 'zstd'
+        return dependencies
+
     @property
     def _cxx(self):
         if 'CXX' in os.environ:
@@ -115,6 +330,9 @@ class BoostConan(ConanFile):
         if 'AR' in os.environ:
             return os.environ['AR']
 
+        if self._lto_archivers:
+            return self._lto_archivers[0]
+
         return self.platform_inspector.ar
 
     @property
@@ -122,22 +340,107 @@ class BoostConan(ConanFile):
         if 'RANLIB' in os.environ:
             return os.environ['RANLIB']
 
+        if self._lto_archivers:
+            return self._lto_archivers[1]
+
         return self.platform_inspector.ranlib
 
+    @property
+    def _lto_mode(self):
+        lto = str(self.options.lto)
+        if lto == 'thin' and "clang" not in str(self.settings.compiler):
+            self.output.warn("ThinLTO is only supported by clang, using full LTO instead")
+            return 'full'
+        return lto
+
+    @property
+    def _lto_archivers(self):
+        """
+        LTO-aware (archiver, ranlib) pair living next to the compiler, so static archives get a symbol index for the
+        LTO objects: gcc-ar/gcc-ranlib for gcc and llvm-ar/llvm-ranlib for clang. None when not needed or not found
+        """
+        if self.options.lto == 'off' or self.options.shared or self._is_msvc:
+            return None
+
+        # Apple's ar/ranlib (cctools) handle LTO objects through libLTO
+        if self.settings.compiler == "apple-clang":
+            return None
+
+        cxx_dir, cxx_name = os.path.split(self._cxx)
+        if self.settings.compiler == "gcc" and "g++" in cxx_name:
+            # x86_64-linux-gnu-g++-10 -> x86_64-linux-gnu-gcc-ar-10
+            names = [cxx_name.replace("g++", "gcc-ar"), cxx_name.replace("g++", "gcc-ranlib")]
+        elif "clang" in str(self.settings.compiler) and "clang++" in cxx_name:
+            # clang++-11 -> llvm-ar-11, the target triple prefix of the NDK compilers is not used by the llvm tools
+            version_suffix = cxx_name.split("clang++", 1)[1]
+            names = ["llvm-ar" + version_suffix, "llvm-ranlib" + version_suffix]
+        else:
+            names = []
+
+        tools_found = []
+        for name in names:
+            path = os.path.join(cxx_dir, name) if cxx_dir else tools.which(name)
+            if path and os.path.isfile(path):
+                tools_found.append(path)
+
+        if not names or len(tools_found) != len(names):
+            self.output.warn("Unable to find LTO-aware archiver tools for %s, keeping the default ones" % self._cxx)
+            return None
+
+        return tools_found
+
+    @property
+    def _compiler_launcher(self):
+        # BOOST_COMPILER_LAUNCHER takes precedence over the option, an empty value disables the launcher
+        if 'BOOST_COMPILER_LAUNCHER' in os.environ:
+            return os.environ['BOOST_COMPILER_LAUNCHER'] or None
+
+        launcher = str(self.options.compiler_launcher)
+        return None if launcher == 'none' else launcher
+
+    @property
+    def _is_sccache(self):
+        launcher = self._compiler_launcher
+        return launcher is not None and 'sccache' in os.path.basename(launcher)
+
+    @property
+    def _compiler_launcher_env(self):
+        """
+        Environment for the compiler launcher. The package-specific part of the paths (build folder, source folder) is
+        stripped from the compiler command lines so cache hits carry across package folders. sccache has no equivalent
+        of CCACHE_BASEDIR: it only hits for builds in the same package folder
+        """
+        if not self._compiler_launcher:
+            return {}
+        if self._is_sccache:
+            return {}
+
+        base_dir = os.path.commonpath([os.path.abspath(self.source_folder), os.path.abspath(self.build_folder)])
+        return {'CCACHE_BASEDIR': base_dir,
+                'CCACHE_NOHASHDIR': '1',
+                'CCACHE_SLOPPINESS': 'file_macro,time_macros,include_file_mtime,include_file_ctime'}
+
     def _get_named_flags(self, env_var, inspector_attr):
         env_flags = ''
         if env_var in os.environ:
             env_flags = os.environ[env_var]
 
-        flags = getattr(self.platform_inspector, inspector_attr)
+        flags = list(getattr(self.platform_inspector, inspector_attr))
         flags.append(env_flags)
 
         result = ' '.join(flags)
         return result if len(result.strip()) != 0 else None
 
+    @staticmethod
+    def _append_flags(flags, extra_flags):
+        extra_flags = ' '.join(extra_flags)
+        if not extra_flags:
+            return flags
+        return flags + ' ' + extra_flags if flags is not None else extra_flags
+
     @property
     def _c_flags(self):
-        return self._get_named_flags('CFLAGS', 'c_flags')
+        return self._append_flags(self._get_named_flags('CFLAGS', 'c_flags'), self._section_flags)
 
     @property
     def _as_flags(self):
@@ -160,25 +463,183 @@ class BoostConan(ConanFile):
         if self.settings.get_safe("compiler.cppstd"):
             append(cppstd_flag(self.settings))
 
+        for flag in self._cpu_target_flags + self._section_flags:
+            append(flag)
+
+        if self._compiler_launcher and self._has_debug_info and not self._is_msvc:
+            # Keep the absolute build paths out of the debug info so the cached objects are relocatable
+            append('-fdebug-prefix-map=%s=.' % self._compiler_launcher_env.get('CCACHE_BASEDIR', self.build_folder))
+
         return flags
 
+    @property
+    def _cpu_target_flags(self):
+        cpu_target = str(self.options.cpu_target)
+        if cpu_target == 'generic':
+            return []
+
+        if self._is_msvc or self._is_clang_cl:
+            msvc_flags = {'x86-64-v3': ['/arch:AVX2'], 'x86-64-v4': ['/arch:AVX512']}
+            if cpu_target not in msvc_flags:
+                self.output.warn("cpu_target=%s has no equivalent for %s, using the default code generation"
+                                 % (cpu_target, self.settings.compiler))
+            return msvc_flags.get(cpu_target, [])
+
+        if cpu_target == 'native':
+            return ['-march=native', '-mtune=native']
+        if cpu_target.startswith('x86-64'):
+            # The micro-architecture levels have no matching -mtune, tune for the current generic CPUs
+            return ['-march=%s' % cpu_target, '-mtune=generic']
+        return ['-march=%s' % cpu_target]
+
+    @property
+    def _section_flags(self):
+        """
+        One section per function and data object, so the linker can drop and fold them one by one
+        """
+        if not self.options.gc_sections and not self.options.icf:
+            return []
+        return ['/Gy'] if self._is_msvc else ['-ffunction-sections', '-fdata-sections']
+
+    @property
+    def _linker_supports_gdb_index(self):
+        return self.options.linker != 'default' and not self._is_msvc and not tools.is_apple_os(self.settings.os)
+
+    @property
+    def _linker_flags(self):
+        """
+        Linker selection, dead code stripping and identical code folding flags of the boost libraries
+        """
+        flags = []
+        linker = str(self.options.linker)
+        if self._is_msvc:
+            if linker != 'default':
+                self.output.warn("linker=%s is ignored with Visual Studio" % linker)
+            if self.options.gc_sections:
+                flags.append('/OPT:REF')
+            if self.options.icf:
+                flags.append('/OPT:ICF')
+            return flags
+
+        if linker != 'default':
+            flags.append('-fuse-ld=%s' % linker)
+        if self.options.gc_sections:
+            flags.append('-Wl,-dead_strip' if tools.is_apple_os(self.settings.os) else '-Wl,--gc-sections')
+        if self.options.icf:
+            if linker == 'default':
+                # Neither GNU ld nor ld64 fold identical code
+                self.output.warn("icf needs the gold, lld or mold linker, ignoring it")
+            else:
+                flags.append('-Wl,--icf=all')
+        return flags
+
+    @property
+    def _consumer_linker_flags(self):
+        """
+        The dead code stripping flags the consumers of the static libraries link with. Their linker is their choice:
+        identical code folding is only passed on with msvc, GNU ld does not know --icf
+        """
+        if self._is_msvc:
+            return self._linker_flags
+        if self.options.gc_sections:
+            return ['-Wl,-dead_strip' if tools.is_apple_os(self.settings.os) else '-Wl,--gc-sections']
+        return []
+
     @property
     def _ld_flags(self):
         if self.options.shared:
-            return self._get_named_flags('LDFLAGS', 'ld_shared_flags')
+            flags = self._get_named_flags('LDFLAGS', 'ld_shared_flags')
         else:
-            return self._get_named_flags('LDFLAGS', 'ld_static_flags')
+            flags = self._get_named_flags('LDFLAGS', 'ld_static_flags')
+
+        linker_flags = self._linker_flags
+        if self._debug_info == 'split' and self._linker_supports_gdb_index:
+            linker_flags.append('-Wl,--gdb-index')
+        return self._append_flags(flags, linker_flags)
 
     @property
     def _b2_exe(self):
         folder = os.path.join(self.source_folder, self._source_subfolder, "tools", "build")
         return os.path.join(folder, "b2.exe" if tools.os_info.is_windows else "b2")
 
+    @property
+    def _b2_host_compiler(self):
+        """
+        The compiler the bootstrap will pick: the MSVC from vcvars on Windows, the default C compiler otherwise
+        (bootstrap runs with CC/CXX cleared)
+        """
+        if tools.os_info.is_windows and self._is_msvc:
+            return "%s %s" % (self.settings.compiler, self.settings.compiler.version)
+
+        for candidate in ['cc', 'gcc', 'clang']:
+            path = tools.which(candidate)
+            if path:
+                return os.path.realpath(path)
+        return 'unknown'
+
+    @property
+    def _b2_cache_dir(self):
+        """
+        Host-keyed location of the cached b2 engine, outside of the package folder so every configuration can reuse it
+        """
+        if 'BOOST_B2_CACHE_DIR' in os.environ:
+            root = os.environ['BOOST_B2_CACHE_DIR']
+        else:
+            user_home = os.environ.get('CONAN_USER_HOME', os.path.expanduser('~'))
+            root = os.path.join(user_home, '.conan', 'boost_b2_cache')
+
+        key = '|'.join([self.boost_version, platform.system(), platform.machine(), self._b2_host_compiler])
+        return os.path.join(root, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
     @property
     def _boost_dir(self):
-        # return self._bcp_dir if self._use_bcp else self._source_subfolder
         return self._source_subfolder
 
+    @property
+    def _header_subset(self):
+        subset = str(self.options.header_subset)
+        if subset == "None":
+            return []
+        return subset.replace(",", " ").split()
+
+    @property
+    def _disabled_libraries(self):
+        if self.options.header_only:
+            return []
+        return [lib for lib in LIB_LIST if getattr(self.options, "without_%s" % lib)]
+
+    @property
+    def _use_bcp(self):
+        return len(self._header_subset) != 0 or len(self._disabled_libraries) != 0
+
+    @property
+    def _bcp_dir(self):
+        return os.path.join(self.build_folder, "bcp")
+
+    @property
+    def _bcp_modules(self):
+        """
+        The requested libraries plus, for compiled packages, every library that is not disabled with without_*. Without
+        header_subset, all the libraries of the source tree but the disabled ones: bcp still brings back the headers of
+        a disabled library the others include
+        """
+        if not self._header_subset:
+            libs_dir = os.path.join(self.source_folder, self._source_subfolder, "libs")
+            return sorted(lib for lib in os.listdir(libs_dir)
+                          if os.path.isdir(os.path.join(libs_dir, lib)) and lib not in self._disabled_libraries)
+
+        modules = list(self._header_subset)
+        if not self.options.header_only:
+            modules.extend(lib for lib in LIB_LIST if lib not in self._disabled_libraries and lib not in modules)
+        return modules
+
+    @property
+    def _package_headers_dir(self):
+        if self._is_versioned_layout:
+            version_tokens = str(self.version).split(".")
+            return os.path.join("include", "boost-%s_%s" % (version_tokens[0], version_tokens[1]), "boost")
+        return os.path.join("include", "boost")
+
     @property
     def _toolset(self):
         compiler = str(self.settings.compiler)
@@ -234,35 +695,328 @@ class BoostConan(ConanFile):
         if self._zip_bzip2_requires_needed:
             self.requires('bzip2/1.0.8@conan-burrito/stable')
             self.requires('zlib/1.2.11@conan-burrito/stable')
+            if self.options.iostreams_lzma:
+                self.requires('xz_utils/5.2.5@conan-burrito/stable')
+            if self.options.iostreams_zstd:
+                self.requires('zstd/1.4.8@conan-burrito/stable')
 
     def source(self):
-        tools.get(**self.conan_data["sources"][self.version])
+        with self._recipe_phase("source", profile=True):
+            self._source()
+
+    def _source(self):
+        archive = self._cached_source_archive()
+        if archive:
+            self._extract_source_archive(archive)
+        else:
+            tools.get(**self.conan_data["sources"][self.version])
         os.rename("boost_%s" % self.version.replace(".", "_"), self._source_subfolder)
         for patch in self.conan_data["patches"].get(self.version, []):
             tools.patch(**patch)
 
+    @property
+    def _source_cache_dir(self):
+        """
+        Content-addressed store of the source archives, keyed by their conandata sha256. An empty BOOST_SOURCE_CACHE_DIR
+        disables it
+        """
+        if 'BOOST_SOURCE_CACHE_DIR' in os.environ:
+            return os.environ['BOOST_SOURCE_CACHE_DIR'] or None
+
+        user_home = os.environ.get('CONAN_USER_HOME', os.path.expanduser('~'))
+        return os.path.join(user_home, '.conan', 'boost_source_cache')
+
+    def _cached_source_archive(self):
+        """
+        Path of the verified source archive in the cache, downloading it first when missing. None without a cache
+        """
+        cache_dir = self._source_cache_dir
+        if not cache_dir:
+            return None
+
+        source = self.conan_data["sources"][self.version]
+        urls = source["url"] if isinstance(source["url"], list) else [source["url"]]
+        sha256 = source["sha256"]
+        archive = os.path.join(cache_dir, sha256, os.path.basename(urls[0]))
+        if os.path.isfile(archive):
+            if self._sha256sum(archive) == sha256:
+                self.output.info('Using the cached source archive "%s"' % archive)
+                return archive
+            self.output.warn('Checksum mismatch for the cached source archive "%s", downloading it again' % archive)
+            os.remove(archive)
+
+        tools.mkdir(os.path.dirname(archive))
+        # Download under a temporary name first, so a concurrent build never picks up a partial archive
+        tmp_archive = archive + '.tmp%d' % os.getpid()
+        tools.download(urls, tmp_archive, sha256=sha256)
+        os.replace(tmp_archive, archive)
+        self.output.info('Stored the source archive in "%s"' % archive)
+        return archive
+
+    @property
+    def _parallel_bzip2(self):
+        for name in ["lbzip2", "pbzip2"]:
+            path = tools.which(name)
+            if path:
+                return path
+        return None
+
+    def _extract_source_archive(self, archive):
+        """
+        Extracts the archive without the tests and the documentation, decompressing it with lbzip2/pbzip2 when found
+        """
+        decompressor = self._parallel_bzip2 if archive.endswith(".bz2") else None
+        process = None
+        if decompressor:
+            self.output.info("Decompressing the sources with %s" % decompressor)
+            process = subprocess.Popen([decompressor, "-dc", archive], stdout=subprocess.PIPE)
+            tar = tarfile.open(fileobj=process.stdout, mode="r|")
+        else:
+            tar = tarfile.open(archive, mode="r|*")
+
+        extracted = skipped = 0
+        with tar:
+            # Stream mode: members come in archive order and are extracted as they are read
+            for member in tar:
+                if SOURCE_SKIPPED_PATHS.match(member.name):
+                    skipped += 1
+                    continue
+                tar.extract(member)
+                extracted += 1
+
+        if process:
+            process.stdout.close()
+            if process.wait() != 0:
+                raise ConanException("%s failed to decompress %s" % (decompressor, archive))
+        self.output.info("Extracted %d files, skipped %d test and documentation files" % (extracted, skipped))
+
     # def configure(self):
     #     if self.settings.os == 'Emscripten':
     #         self.output.warn('Forscing header-only builds for Emscripten')
     #         self.options.shared = True
     #         self.options.header_only = True
 
+    def configure(self):
+        cpu_target = str(self.options.cpu_target)
+        if cpu_target in CPU_TARGETS and str(self.settings.arch) not in CPU_TARGETS[cpu_target]:
+            raise ConanInvalidConfiguration("cpu_target=%s is not available for arch=%s" % (cpu_target,
+                                                                                            self.settings.arch))
+        if cpu_target.startswith('x86-64') and not self._is_msvc and not self._is_clang_cl:
+            min_version = CPU_LEVEL_MIN_COMPILER.get(str(self.settings.compiler))
+            if min_version and Version(str(self.settings.compiler.version)) < min_version:
+                raise ConanInvalidConfiguration("cpu_target=%s requires %s >= %s" % (cpu_target, self.settings.compiler,
+                                                                                     min_version))
+        if cpu_target == 'native':
+            self.output.warn("cpu_target=native binaries only run on CPUs like the one of the builder")
+
+        context_impl = str(self.options.context_impl)
+        if context_impl == 'winfib' and self.settings.os != "Windows":
+            raise ConanInvalidConfiguration("context_impl=winfib is only available on Windows")
+        if context_impl == 'ucontext' and self.settings.os == "Windows":
+            raise ConanInvalidConfiguration("context_impl=ucontext is not available on Windows")
+        if self.options.segmented_stacks and context_impl not in ['default', 'ucontext']:
+            raise ConanInvalidConfiguration("segmented_stacks requires context_impl=ucontext")
+
+        if self._stacktrace_backend in ['backtrace', 'addr2line'] and self.settings.os == "Windows":
+            raise ConanInvalidConfiguration("stacktrace_backend=%s is not available on Windows" %
+                                            self.options.stacktrace_backend)
+        if self._stacktrace_backend == 'backtrace' and self.settings.compiler != "gcc":
+            # b2 would silently skip boost_stacktrace_backtrace, backtrace.h only comes with GCC
+            raise ConanInvalidConfiguration("stacktrace_backend=backtrace requires gcc and its libbacktrace")
+
+        if self.options.unity_build and not self.options.header_only:
+            if self.settings.compiler not in ["gcc", "clang", "apple-clang"] or self._is_clang_cl:
+                # The msvc toolset passes the sources through response files, the dry run does not show them
+                raise ConanInvalidConfiguration("unity_build is only supported with the gcc and clang toolsets")
+            # The unity build rewrites library sources: it gets a private copy of the source tree
+            self.no_copy_source = False
+
+        if self.options.debug_info != 'embedded' and not self.options.header_only and not self._is_msvc and \
+                (not self.options.shared or self.options.multi_config == 'build_type_link'):
+            # Debuggers only follow the debug link and find the .dwp file of the shared libraries. The objects of a
+            # static library end up in the executables, their split debug info refers to .dwo files by the absolute
+            # path of the build folder
+            raise ConanInvalidConfiguration("debug_info=%s is only available for shared libraries" %
+                                            self.options.debug_info)
+
+    def _create_platform_inspector(self):
+        self.platform_inspector = self.python_requires['platform-inspector'].module.PlatformInspector(conanfile=self,
+                                                                                                      verbose=True)
+
     def build(self):
+        try:
+            self._build()
+        finally:
+            if self._recipe_profile:
+                self._write_recipe_profile(self.build_folder)
+
+    def _build(self):
         if self.options.header_only:
+            if self._use_bcp:
+                with self._recipe_phase("clean", profile=True):
+                    self._clean()
+                with self._recipe_phase("bootstrap"):
+                    self._prepare_b2()
+                with self._recipe_phase("bcp"):
+                    self._run_bcp()
             self.output.warn("Header only package, skipping build")
             return
 
-        self.platform_inspector = self.python_requires['platform-inspector'].module.PlatformInspector(conanfile=self,
-                                                                                                      verbose=True)
+        self._create_platform_inspector()
+
+        with self._recipe_phase("clean", profile=True):
+            self._clean(keep_build_dir=self._can_reuse_build_dir())
+        with self._recipe_phase("bootstrap"):
+            self._prepare_b2()
+
+        with self._recipe_phase("user_config", profile=True):
+            if self._build_timing_enabled:
+                self._prepare_build_timing()
+            self._write_user_config_jam()
+            self._write_build_stamp()
+
+        if self._is_sccache:
+            self.output.warn("sccache keys its cache on the absolute paths, hits do not carry across package folders")
+        launcher_counters = self._compiler_launcher_counters()
+        unity_batches = None
+        if self._unity_enabled:
+            with self._recipe_phase("unity_sources", profile=True):
+                unity_batches = self._prepare_unity_build()
+        try:
+            with self._recipe_phase("b2"):
+                if self._pgo_enabled:
+                    self._build_with_pgo()
+                else:
+                    self._run_b2()
+        finally:
+            if unity_batches:
+                self._restore_unity_sources(unity_batches)
+
+        with self._recipe_phase("build_reports", profile=True):
+            self._show_compiler_launcher_stats(launcher_counters)
+            if self._build_timing_enabled:
+                self._write_build_timing_report()
+            if unity_batches:
+                self._write_unity_report(unity_batches)
+
+        if self._use_bcp:
+            with self._recipe_phase("bcp"):
+                self._run_bcp()
 
-        self._clean()
-        self._bootstrap()
+    @property
+    def _recipe_profile(self):
+        """
+        BOOST_RECIPE_PROFILE: 'timing' times the recipe phases, 'cprofile' also profiles the Python side ones
+        """
+        mode = os.environ.get('BOOST_RECIPE_PROFILE', '').lower()
+        return mode if mode in ['timing', 'cprofile'] else None
+
+    @contextmanager
+    def _recipe_phase(self, name, profile=False):
+        """
+        Times a recipe phase, under cProfile as well for the phases spending their time in Python rather than in a
+        subprocess
+        """
+        mode = self._recipe_profile
+        if not mode:
+            yield
+            return
+
+        profiler = cProfile.Profile() if profile and mode == 'cprofile' else None
+        start = time.time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            seconds = time.time() - start
+            RECIPE_PROFILE["phases"].append({"phase": name, "seconds": seconds, "profiler": profiler})
+            self.output.info("Recipe phase %s: %.2fs" % (name, seconds))
+
+    def _write_recipe_profile(self, folder):
+        """
+        Writes the phases timed so far to recipe_profile.json in the folder, with the cProfile statistics of the
+        profiled phases in recipe_profile/, and prints the summary table
+        """
+        RECIPE_PROFILE["report_folder"] = folder
+        phases = RECIPE_PROFILE["phases"]
+        total = sum(phase["seconds"] for phase in phases)
+
+        entries = []
+        self.output.info("Recipe phases (%.1fs in total):" % total)
+        for index, phase in enumerate(phases):
+            entry = {"phase": phase["phase"], "seconds": phase["seconds"]}
+            line = "  %-20s %8.2fs %5.1f%%" % (phase["phase"], phase["seconds"],
+                                              phase["seconds"] * 100 / total if total else 0)
+            if phase["profiler"]:
+                stats_file = os.path.join(folder, "recipe_profile", "%02d-%s.prof" % (index, phase["phase"]))
+                tools.mkdir(os.path.dirname(stats_file))
+                phase["profiler"].dump_stats(stats_file)
+                with open(os.path.splitext(stats_file)[0] + ".txt", "w") as f:
+                    pstats.Stats(phase["profiler"], stream=f).sort_stats("cumulative").print_stats(RECIPE_PROFILE_TOP)
+                entry["profile"] = os.path.relpath(stats_file, folder)
+                line += "  (%s)" % entry["profile"]
+            entries.append(entry)
+            self.output.info(line)
+
+        report = {"total_seconds": total, "phases": entries}
+        tools.save(os.path.join(folder, "recipe_profile.json"), json.dumps(report, indent=2))
+
+    def package_id(self):
+        del self.info.options.compiler_launcher
+        del self.info.options.b2_cache
+        del self.info.options.incremental
+        del self.info.options.build_timing
+        del self.info.options.build_jobs
+        del self.info.options.job_memory
+        del self.info.options.heavy_job_memory
+        if self._multi_config_variants:
+            del self.info.settings.build_type
+            if self.options.multi_config == 'build_type_link':
+                del self.info.options.shared
+        if not self._has_debug_info:
+            del self.info.options.debug_info
+        if not self._zip_bzip2_requires_needed:
+            del self.info.options.iostreams_lzma
+            del self.info.options.iostreams_zstd
+        if self.options.without_stacktrace:
+            del self.info.options.stacktrace_backend
+        # Only the consumers see the allocator, the libraries are the same
+        del self.info.options.context_stack_allocator
+        if self.options.without_log:
+            for feature in LOG_FEATURES:
+                delattr(self.info.options, "log_%s" % feature)
+
+    # ---------- BUILDING METHODS ----------
 
-        self._write_user_config_jam()
+    def _run_b2(self, extra_flags=None, prefix=None):
+        build_flags = self._build_flags
+        if prefix:
+            build_flags = ["--prefix=%s" % prefix if flag.startswith("--prefix=") else flag for flag in build_flags]
+        if extra_flags:
+            build_flags.extend(extra_flags)
+
+        jobs, heavy_jobs = self._job_limits
+        heavy_libraries = [lib for lib in HEAVY_LIBRARIES if not getattr(self.options, "without_%s" % lib)]
+        if heavy_jobs >= jobs or not heavy_libraries:
+            self._run_b2_pass(build_flags)
+            return
 
-        b2_flags = ' '.join(self._build_flags)  # + ' --no-cmake-config'
+        # b2 refuses --with-<lib> and --without-<lib> together, the second pass only selects the heavy libraries and
+        # finds their dependencies already built by the first one
+        self.output.info("Building %s in a second pass with %d jobs" % (", ".join(heavy_libraries), heavy_jobs))
+        self._run_b2_pass(build_flags + ["--without-%s" % lib for lib in heavy_libraries])
+        heavy_flags = [flag for flag in build_flags if not flag.startswith("--without-")]
+        heavy_flags = ["-j%s" % heavy_jobs if flag.startswith("-j") else flag for flag in heavy_flags]
+        self._run_b2_pass(heavy_flags + ["--with-%s" % lib for lib in heavy_libraries])
+
+    def _run_b2_pass(self, build_flags, output=True):
+        b2_flags = ' '.join(build_flags)  # + ' --no-cmake-config'
         full_command = '%s %s' % (self._b2_exe, b2_flags)
-        full_command += ' --debug-configuration --build-dir="%s"' % self.build_folder
+        # A normalised build dir keeps the object paths (and so the compiler cache keys) stable
+        full_command += ' --debug-configuration --build-dir="%s"' % os.path.normpath(self.build_folder).replace("\\", "/")
 
         if VERBOSE_BUILD_LOG:
             full_command += ' -d2'
@@ -272,18 +1026,663 @@ class BoostConan(ConanFile):
         sources = os.path.join(self.source_folder, self._boost_dir)
         with tools.vcvars(self.settings) if self._is_msvc else tools.no_op():
             with tools.chdir(sources):
-                # To show the libraries *1
-                # self.run("%s --show-libraries" % b2_exe)
-                self.run(full_command, run_environment=True)
+                with tools.environment_append(self._b2_env):
+                    # To show the libraries *1
+                    # self.run("%s --show-libraries" % b2_exe)
+                    self.run(full_command, run_environment=True, output=output)
 
+    @staticmethod
+    def _read_memory_file(path):
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except (IOError, OSError):
+            return None
 
-    # ---------- BUILDING METHODS ----------
+    @property
+    def _available_memory_mb(self):
+        """
+        Memory available to the build in MB: MemAvailable of /proc/meminfo bounded by the cgroup (v2 or v1) limit of
+        the container, None when unknown
+        """
+        meminfo = self._read_memory_file("/proc/meminfo")
+        if not meminfo:
+            return None
+
+        available = None
+        for line in meminfo.splitlines():
+            if line.startswith("MemAvailable:"):
+                available = int(line.split()[1]) // 1024
+        if available is None:
+            return None
+
+        for limit_file, usage_file in [("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+                                       ("/sys/fs/cgroup/memory/memory.limit_in_bytes",
+                                        "/sys/fs/cgroup/memory/memory.usage_in_bytes")]:
+            limit = self._read_memory_file(limit_file)
+            usage = self._read_memory_file(usage_file)
+            if limit and usage and limit.isdigit() and usage.isdigit():
+                # Unlimited cgroup v1 groups report a huge page aligned number
+                cgroup_available = (int(limit) - int(usage)) // (1024 * 1024)
+                if cgroup_available < available:
+                    self.output.info("Build jobs: the cgroup limits the memory to %d MB" % cgroup_available)
+                    available = max(cgroup_available, 0)
+                break
+        return available
+
+    def _job_memory_mb(self, option, default):
+        value = str(getattr(self.options, option))
+        if value == 'None':
+            return default
+        if not value.isdigit() or int(value) == 0:
+            raise ConanInvalidConfiguration("%s must be a number of MB, got '%s'" % (option, value))
+        return int(value)
+
+    _job_limits_cache = None
+
+    @property
+    def _job_limits(self):
+        """
+        (jobs, heavy library jobs) of the b2 build. With build_jobs=memory, as many jobs as both the CPUs and the
+        available memory over the per job estimate allow
+        """
+        if self._job_limits_cache is not None:
+            return self._job_limits_cache
+
+        cpus = tools.cpu_count()
+        jobs = heavy_jobs = cpus
+        if self.options.build_jobs == 'memory':
+            available = self._available_memory_mb
+            if available is None:
+                self.output.warn("Build jobs: unable to read the available memory, using one job per CPU")
+            else:
+                job_memory = self._job_memory_mb('job_memory', JOB_MEMORY_MB)
+                heavy_job_memory = self._job_memory_mb('heavy_job_memory', HEAVY_JOB_MEMORY_MB)
+                jobs = max(1, min(cpus, available // job_memory))
+                heavy_jobs = max(1, min(jobs, available // heavy_job_memory))
+                self.output.info("Build jobs: %d MB available, %d MB per job, %d MB per heavy library job" %
+                                 (available, job_memory, heavy_job_memory))
+
+        self.output.info("Build jobs: %d CPUs, %d jobs, %d jobs for %s" % (cpus, jobs, heavy_jobs,
+                                                                          ", ".join(HEAVY_LIBRARIES)))
+        self._job_limits_cache = (jobs, heavy_jobs)
+        return self._job_limits_cache
 
-    def _clean(self):
+    @property
+    def _b2_env(self):
+        env = dict(self._compiler_launcher_env)
+        if self._build_timing_enabled:
+            env['BOOST_BUILD_TIMING_LOG'] = self._build_timing_log
+        return env
+
+    def _prepare_b2(self):
+        if not self._restore_cached_b2():
+            self._bootstrap()
+            self._store_cached_b2()
+
+    def _run_bcp(self):
+        """
+        Builds the bcp tool for the host and extracts the headers of the requested libraries, with all the headers they
+        include, into the bcp dir
+        """
         src = os.path.join(self.source_folder, self._source_subfolder)
-        clean_dirs = [os.path.join(self.build_folder, "bin.v2"),
-                      os.path.join(self.build_folder, "architecture"),
-                      os.path.join(src, "dist", "bin"),
+        bcp_exe = os.path.join(src, "dist", "bin", "bcp.exe" if tools.os_info.is_windows else "bcp")
+
+        # bcp runs on the host: an empty user config lets b2 pick the default host toolset
+        host_config = os.path.join(self.build_folder, "bcp-user-config.jam")
+        tools.save(host_config, "")
+        build_dir = os.path.join(self.build_folder, "bcp-build")
+        with tools.vcvars(self.settings) if self._is_msvc else tools.no_op():
+            with tools.chdir(src), tools.environment_append(self._host_tools_env):
+                self.run('%s tools/bcp --user-config="%s" --build-dir="%s" -j%s' %
+                         (self._b2_exe, host_config, build_dir, tools.cpu_count()))
+
+        if os.path.isdir(self._bcp_dir):
+            shutil.rmtree(self._bcp_dir)
+        tools.mkdir(self._bcp_dir)
+
+        modules = self._bcp_modules
+        self.output.info("Extracting the headers of: %s" % ", ".join(modules))
+        self.run('"%s" --boost="%s" %s "%s"' % (bcp_exe, src, " ".join(modules), self._bcp_dir))
+
+    # ---------- BUILD TIMING ----------
+
+    @property
+    def _build_timer_python(self):
+        """
+        Interpreter running the compiler wrapper: conan may be a frozen executable, sys.executable is not a python then
+        """
+        if 'BOOST_BUILD_TIMING_PYTHON' in os.environ:
+            return os.environ['BOOST_BUILD_TIMING_PYTHON']
+        return tools.which("python3") or tools.which("python")
+
+    @property
+    def _build_timing_enabled(self):
+        if not self.options.build_timing:
+            return False
+        if self._is_msvc or self._is_clang_cl:
+            # The msvc toolset sets up its environment around the compiler command, it cannot be wrapped
+            self.output.warn("build_timing is not supported with the msvc toolset, building without it")
+            return False
+        if not self._build_timer_python:
+            self.output.warn("No python interpreter found for the build_timing compiler wrapper, set "
+                             "BOOST_BUILD_TIMING_PYTHON, building without it")
+            return False
+        return True
+
+    @property
+    def _build_timer_script(self):
+        return os.path.join(self.build_folder, "build_timer.py")
+
+    @property
+    def _build_timing_log(self):
+        return os.path.join(self.build_folder, "build_timing.jsonl")
+
+    @property
+    def _build_profile_file(self):
+        return os.path.join(self.build_folder, "build_profile.json")
+
+    def _prepare_build_timing(self):
+        tools.save(self._build_timer_script, BUILD_TIMER_SCRIPT)
+        tools.save(self._build_timing_log, "")
+
+    @staticmethod
+    def _timed_library(record):
+        """
+        The boost library a compile or link step belongs to, from the libs/<name>/ part of its source or output path
+        """
+        for path in record["sources"] + [record["output"] or ""]:
+            parts = path.replace("\\", "/").split("/")
+            if "libs" in parts[:-1]:
+                return parts[parts.index("libs") + 1]
+        return "other"
+
+    def _write_build_timing_report(self):
+        records = [json.loads(line) for line in tools.load(self._build_timing_log).splitlines() if line.strip()]
+        if not records:
+            self.output.warn("No compile steps were recorded, no build timing report")
+            return
+
+        libraries = {}
+        translation_units = []
+        for record in records:
+            duration = record["end"] - record["start"]
+            library = libraries.setdefault(self._timed_library(record), {"compile_seconds": 0.0,
+                                                                         "link_seconds": 0.0,
+                                                                         "translation_units": 0})
+            if record["kind"] == "compile":
+                library["compile_seconds"] += duration
+                library["translation_units"] += 1
+                translation_units.append({"source": record["sources"][0] if record["sources"] else record["output"],
+                                          "library": self._timed_library(record),
+                                          "seconds": duration})
+            else:
+                library["link_seconds"] += duration
+
+        by_library = sorted(({"library": name, **times} for name, times in libraries.items()),
+                            key=lambda l: l["compile_seconds"] + l["link_seconds"], reverse=True)
+        translation_units.sort(key=lambda tu: tu["seconds"], reverse=True)
+        report = {"wall_seconds": max(r["end"] for r in records) - min(r["start"] for r in records),
+                  "jobs": self._job_limits[0],
+                  "heavy_library_jobs": self._job_limits[1],
+                  "libraries": by_library,
+                  "translation_units": translation_units}
+        tools.save(self._build_profile_file, json.dumps(report, indent=2))
+
+        self.output.info("Build timing: %.1fs wall clock, %d steps" % (report["wall_seconds"], len(records)))
+        self.output.info("Slowest libraries (compile + link seconds, summed over the parallel jobs):")
+        for library in by_library[:BUILD_TIMING_TOP]:
+            self.output.info("  %-20s %8.1fs  (%d translation units)" % (library["library"],
+                                                                        library["compile_seconds"] +
+                                                                        library["link_seconds"],
+                                                                        library["translation_units"]))
+        self.output.info("Slowest translation units:")
+        for tu in translation_units[:BUILD_TIMING_TOP]:
+            self.output.info("  %8.1fs  %s" % (tu["seconds"], tu["source"]))
+
+    # ---------- PRECOMPILED HEADERS ----------
+
+    @property
+    def _pch_enabled(self):
+        if not self.options.precompiled_headers:
+            return False
+
+        if self.settings.compiler not in ["gcc", "clang", "apple-clang"] or self._is_clang_cl:
+            self.output.warn("Precompiled headers are not supported for %s, skipping them" % self.settings.compiler)
+            return False
+
+        return True
+
+    @property
+    def _pch_headers(self):
+        headers = str(self.options.precompiled_headers_list)
+        if headers == "None":
+            return PCH_HEADERS
+        return headers.replace(",", " ").split()
+
+    @property
+    def _pch_folder(self):
+        return os.path.join(self.package_folder, "pch")
+
+    @staticmethod
+    def _pch_wrapper_name(header):
+        # boost/spirit/home/x3.hpp -> boost_spirit_home_x3.hpp
+        return header.replace("/", "_").replace("\\", "_")
+
+    def _build_precompiled_headers(self):
+        """
+        Precompiles each header through a wrapper header, so consumers only need '-include <pch>/<wrapper>': gcc and
+        clang pick up the <wrapper>.gch/<wrapper>.pch next to it, and fall back to parsing it when the flags do not match.
+        Runs at package time, against the packaged headers the consumers will compile with
+        """
+        if os.path.isdir(self._pch_folder):
+            shutil.rmtree(self._pch_folder)
+        tools.mkdir(self._pch_folder)
+
+        include_dir = os.path.dirname(os.path.join(self.package_folder, self._package_headers_dir))
+        extension = ".gch" if self.settings.compiler == "gcc" else ".pch"
+        flags = [self._cxx_flags or ""] + self._apple_target_flags + ["-D%s" % d for d in self._consumer_defines]
+        if self.settings.os != "Windows" and self.options.get_safe("fPIC"):
+            flags.append("-fPIC")
+        flags = " ".join(f for f in flags if f)
+
+        built = []
+        for header in self._pch_headers:
+            if not os.path.isfile(os.path.join(include_dir, header)):
+                self.output.warn("Skipping the precompiled header for %s: not found" % header)
+                continue
+
+            wrapper = os.path.join(self._pch_folder, self._pch_wrapper_name(header))
+            tools.save(wrapper, "#include <%s>\n" % header)
+            self.run('"%s" %s -I"%s" -x c++-header "%s" -o "%s"' % (self._cxx, flags, include_dir, wrapper,
+                                                                   wrapper + extension))
+            built.append(self._pch_wrapper_name(header))
+
+        tools.save(os.path.join(self._pch_folder, "boost-pch.json"),
+                   json.dumps({"headers": built, "flags": flags}, indent=2))
+
+        cmake_helper = ["# Precompiled boost headers, built with: %s" % flags,
+                        'set(BOOST_PCH_DIR "${CMAKE_CURRENT_LIST_DIR}")',
+                        "set(BOOST_PCH_HEADERS %s)" % " ".join(built),
+                        "",
+                        "# A translation unit can only use one precompiled header: boost_target_precompiled_headers(<target>",
+                        "# <header>) picks the one of <target>, e.g. boost/asio.hpp",
+                        "function(boost_target_precompiled_headers target header)",
+                        '    string(REPLACE "/" "_" wrapper "${header}")',
+                        '    list(FIND BOOST_PCH_HEADERS "${wrapper}" index)',
+                        "    if(index EQUAL -1)",
+                        '        message(FATAL_ERROR "${header} is not precompiled, available: ${BOOST_PCH_HEADERS}")',
+                        "    endif()",
+                        '    target_compile_options(${target} PRIVATE -Winvalid-pch -include "${BOOST_PCH_DIR}/${wrapper}")',
+                        "endfunction()",
+                        ""]
+        tools.save(os.path.join(self._pch_folder, "boost-pch.cmake"), "\n".join(cmake_helper))
+
+    # ---------- PGO ----------
+
+    @property
+    def _pgo_enabled(self):
+        if not self.options.pgo:
+            return False
+
+        if tools.cross_building(self.settings):
+            self.output.warn("PGO needs to run the training executables, disabled when cross building")
+            return False
+
+        if self.settings.compiler not in ["gcc", "clang", "apple-clang"] or self._is_clang_cl:
+            self.output.warn("PGO is not supported for %s, building without it" % self.settings.compiler)
+            return False
+
+        return True
+
+    @property
+    def _pgo_folder(self):
+        return os.path.join(self.build_folder, "pgo")
+
+    @property
+    def _pgo_profile_folder(self):
+        return os.path.join(self._pgo_folder, "profile")
+
+    @property
+    def _pgo_merged_profile(self):
+        return os.path.join(self._pgo_profile_folder, "boost.profdata")
+
+    @property
+    def _pgo_training_sources(self):
+        """
+        The training corpus: every .cpp in BOOST_PGO_TRAINING_DIR, or the test_package sources for the enabled libraries
+        """
+        if 'BOOST_PGO_TRAINING_DIR' in os.environ:
+            folder = os.environ['BOOST_PGO_TRAINING_DIR']
+            return [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith(".cpp")]
+
+        folder = os.path.join(self.source_folder, "test_package")
+        corpus = {"regex.cpp": ["regex"],
+                  "coroutine.cpp": ["coroutine", "context", "thread"],
+                  "complex.cpp": ["filesystem", "log", "fiber", "context", "thread"],
+                  "random.cpp": ["random"]}
+        return [os.path.join(folder, source) for source, libs in sorted(corpus.items())
+                if not any(getattr(self.options, "without_%s" % lib) for lib in libs)]
+
+    def _pgo_flags(self, stage):
+        profile = self._pgo_profile_folder.replace("\\", "/")
+        if self.settings.compiler == "gcc":
+            if stage == "generate":
+                return ["-fprofile-generate=%s" % profile, "-fprofile-update=atomic"]
+            return ["-fprofile-use=%s" % profile, "-fprofile-correction", "-Wno-missing-profile"]
+
+        if stage == "generate":
+            return ["-fprofile-instr-generate=%s/boost-%%p.profraw" % profile]
+        return ["-fprofile-instr-use=%s" % self._pgo_merged_profile.replace("\\", "/"),
+                "-Wno-profile-instr-unprofiled", "-Wno-profile-instr-out-of-date"]
+
+    def _build_with_pgo(self):
+        """
+        Two stage build: an instrumented build is trained with the corpus executables, then boost is rebuilt with the
+        collected profile
+        """
+        instrumented_prefix = os.path.join(self._pgo_folder, "instrumented")
+        for folder in [self._pgo_profile_folder, instrumented_prefix]:
+            if os.path.isdir(folder):
+                shutil.rmtree(folder)
+        tools.mkdir(self._pgo_profile_folder)
+
+        self.output.info("PGO stage 1: instrumented build")
+        generate_flags = " ".join(self._pgo_flags("generate"))
+        self._run_b2(['cxxflags="%s"' % generate_flags, 'linkflags="%s"' % generate_flags], prefix=instrumented_prefix)
+
+        self.output.info("PGO training")
+        self._run_pgo_training(instrumented_prefix, generate_flags)
+        if not self._pgo_profiles:
+            # Every training sample failed to build or run: an empty profile would only make the optimized build
+            # slower, keep the regular one instead
+            self.output.warn("PGO training produced no profile, building without PGO")
+            self._clean()
+            self._run_b2()
+            return
+        if self.settings.compiler != "gcc":
+            self._merge_pgo_profile()
+
+        self.output.info("PGO stage 2: optimized build")
+        self._clean()
+        self._run_b2(['cxxflags="%s"' % " ".join(self._pgo_flags("use"))])
+
+    @property
+    def _pgo_profiles(self):
+        extension = ".gcda" if self.settings.compiler == "gcc" else ".profraw"
+        profiles = []
+        for root, _, files in os.walk(self._pgo_profile_folder):
+            profiles.extend(os.path.join(root, f) for f in files if f.endswith(extension))
+        return sorted(profiles)
+
+    def _run_pgo_training(self, prefix, profile_flags):
+        training_folder = os.path.join(self._pgo_folder, "training")
+        include_dir = os.path.join(prefix, "include")
+        lib_dir = os.path.join(prefix, "lib")
+
+        # The instrumented libraries the training executables link with, leaving out the ones needing external
+        # runtimes or bringing their own main()
+        skip = ["python", "numpy", "mpi", "unit_test", "exec_monitor"]
+        libs = [os.path.join(lib_dir, f) for f in sorted(os.listdir(lib_dir))
+                if f.startswith("libboost_") and not any(s in f for s in skip) and
+                (f.endswith(".a") or ".so" in f or f.endswith(".dylib"))]
+        if self._multi_config_variants:
+            # Train with the release variant only, the libraries of the other variants define the same symbols
+            training_variant = ("Release", "shared" if self.options.shared else "static")
+            libs = [lib for lib in libs if self._tagged_library_variant(os.path.basename(lib)) == training_variant]
+        if not tools.is_apple_os(self.settings.os):
+            libs = ["-Wl,--start-group"] + libs + ["-Wl,--end-group"]
+
+        if self._zip_bzip2_requires_needed:
+            for dep in self._iostreams_dependencies:
+                libs.extend('-L"%s"' % path for path in self.deps_cpp_info[dep].lib_paths)
+                libs.extend("-l%s" % lib for lib in self.deps_cpp_info[dep].libs)
+        if self.settings.os == "Linux":
+            libs.extend(["-lrt", "-ldl"])
+        if self.options.multithreading:
+            libs.append("-pthread")
+
+        # The consumer defines carry the ABI of the libraries (context implementation, log features, threading, ...)
+        defines = ["-D%s" % d for d in self._consumer_defines]
+
+        tools.mkdir(training_folder)
+        env = {"LD_LIBRARY_PATH": lib_dir, "DYLD_LIBRARY_PATH": lib_dir}
+        with tools.chdir(training_folder), tools.environment_append(env):
+            for source in self._pgo_training_sources:
+                name = os.path.splitext(os.path.basename(source))[0]
+                exe = os.path.join(training_folder, name)
+                include_dirs = [include_dir, os.path.join(os.path.dirname(source), "include")]
+                command = '"%s" %s %s %s %s %s "%s" -o "%s" %s %s' % (self._cxx, self._cxx_flags or "",
+                                                                     " ".join(self._apple_target_flags), profile_flags,
+                                                                     " ".join('-I"%s"' % d for d in include_dirs),
+                                                                     " ".join(defines), source, exe, profile_flags,
+                                                                     " ".join(libs))
+                # The training is best effort: a sample failing to build or run just does not contribute to the profile
+                try:
+                    self.run(command)
+                    self.run('"%s"' % exe)
+                except Exception as exc:
+                    self.output.warn("PGO training with %s failed: %s" % (source, exc))
+
+    def _merge_pgo_profile(self):
+        cxx_dir = os.path.dirname(self._cxx)
+        profdata = os.path.join(cxx_dir, "llvm-profdata") if cxx_dir else None
+        if not profdata or not os.path.isfile(profdata):
+            profdata = tools.which("llvm-profdata")
+        if self.settings.compiler == "apple-clang":
+            profdata = "xcrun llvm-profdata"
+        elif not profdata:
+            raise ConanInvalidConfiguration("llvm-profdata is required to merge the PGO profile")
+        else:
+            profdata = '"%s"' % profdata
+
+        raw_profiles = " ".join('"%s"' % f for f in self._pgo_profiles)
+        self.run('%s merge -output="%s" %s' % (profdata, self._pgo_merged_profile, raw_profiles))
+
+    @property
+    def _unity_enabled(self):
+        return bool(self.options.unity_build)
+
+    @property
+    def _unity_batch_size(self):
+        value = str(self.options.unity_batch_size)
+        if value == 'None':
+            return UNITY_BATCH_SIZE
+        if not value.isdigit() or int(value) < 2:
+            raise ConanInvalidConfiguration("unity_batch_size must be a number greater than 1, got '%s'" % value)
+        return int(value)
+
+    @property
+    def _unity_skipped_libraries(self):
+        value = str(self.options.unity_skip)
+        if value == 'None':
+            return UNITY_SKIPPED_LIBRARIES
+        return value.replace(",", " ").split()
+
+    def _unity_dry_run(self):
+        """
+        Commands b2 would run for a full build of a single variant
+        """
+        flags = []
+        for flag in self._build_flags:
+            if flag.startswith("variant=") or flag.startswith("link="):
+                # The sources are the same for every variant of a multi_config build
+                flag = flag.split(",")[0]
+            flags.append(flag)
+        output = io.StringIO()
+        self._run_b2_pass(flags + ["-n", "-a"], output=output)
+        return output.getvalue()
+
+    def _unity_groups(self, dry_run):
+        """
+        Library -> sources compiled with the same flags into it, from the compile and link commands of the dry run
+        """
+        sources_dir = os.path.join(self.source_folder, self._boost_dir)
+        objects = {}
+        groups = OrderedDict()
+        for line in dry_run.splitlines():
+            compile_command = UNITY_COMPILE_COMMAND.search(line)
+            if compile_command:
+                obj, source = compile_command.groups()
+                # Sources built with specific flags (instruction sets, defines) only get batched with their peers
+                flags = line.replace(obj, "").replace(source, "")
+                objects[obj] = (os.path.normpath(os.path.join(sources_dir, source)), flags)
+                continue
+
+            tokens = re.findall(r'"([^"]+)"', line)
+            outputs = [token for token in tokens if UNITY_LINK_OUTPUT.search(token)]
+            inputs = [token for token in tokens if token in objects]
+            if not outputs or not inputs:
+                continue
+            library = os.path.basename(outputs[0]).split(".")[0].split("-")[0]
+            library = library[len("lib"):] if library.startswith("lib") else library
+            library = library[len("boost_"):] if library.startswith("boost_") else library
+            for obj in inputs:
+                source, flags = objects[obj]
+                group = groups.setdefault((library, flags), [])
+                if source not in group:
+                    group.append(source)
+        return groups
+
+    def _prepare_unity_build(self):
+        """
+        Amalgamates the library sources in batches: the first source of a batch includes all of them and the others are
+        emptied. Returns library -> batches, the original sources are restored by _restore_unity_sources
+        """
+        if self.no_copy_source:
+            raise ConanException("unity_build rewrites the sources, it cannot use the shared source folder")
+
+        groups = self._unity_groups(self._unity_dry_run())
+        if not groups:
+            raise ConanException("unity_build: no compile command recognized in the b2 dry run of the %s toolset" %
+                                 self._toolset)
+
+        # Sources compiled more than once (several libraries or flag sets) cannot be emptied
+        counts = {}
+        for sources in groups.values():
+            for source in sources:
+                counts[source] = counts.get(source, 0) + 1
+
+        batches = OrderedDict()
+        batch_size = self._unity_batch_size
+        for (library, _), sources in sorted(groups.items(), key=lambda group: group[0]):
+            if library in self._unity_skipped_libraries:
+                continue
+            sources = sorted(source for source in sources
+                             if counts[source] == 1 and os.sep + "libs" + os.sep in source)
+            for i in range(0, len(sources), batch_size):
+                batch = sources[i:i + batch_size]
+                if len(batch) > 1:
+                    batches.setdefault(library, []).append(batch)
+
+        for library, library_batches in batches.items():
+            for batch in library_batches:
+                for source in batch:
+                    shutil.copy2(source, source + ".unity-orig")
+                contents = "// Unity build batch generated by the boost recipe\n"
+                contents += "".join('#include "%s.unity-orig"\n' % source.replace("\\", "/") for source in batch)
+                tools.save(batch[0], contents)
+                for source in batch[1:]:
+                    tools.save(source, "// Amalgamated into %s\n" % os.path.basename(batch[0]))
+
+        self.output.info("Unity build: %d batches of up to %d sources in %d libraries, skipping %s" %
+                         (sum(len(b) for b in batches.values()), batch_size, len(batches),
+                          ", ".join(self._unity_skipped_libraries) or "none"))
+        return batches
+
+    def _restore_unity_sources(self, batches):
+        for library_batches in batches.values():
+            for batch in library_batches:
+                for source in batch:
+                    if os.path.isfile(source + ".unity-orig"):
+                        os.replace(source + ".unity-orig", source)
+
+    def _write_unity_report(self, batches):
+        """
+        Sources and batches of every amalgamated library, with their compile time when build_timing is enabled,
+        compared with the build_profile.json of a normal build given by BOOST_BUILD_PROFILE_BASELINE
+        """
+        compile_seconds = {}
+        baseline_seconds = {}
+        if self._build_timing_enabled and os.path.isfile(self._build_profile_file):
+            for library in json.loads(tools.load(self._build_profile_file))["libraries"]:
+                compile_seconds[library["library"]] = library["compile_seconds"]
+        baseline = os.environ.get('BOOST_BUILD_PROFILE_BASELINE')
+        if baseline and os.path.isfile(baseline):
+            for library in json.loads(tools.load(baseline))["libraries"]:
+                baseline_seconds[library["library"]] = library["compile_seconds"]
+
+        libraries = []
+        self.output.info("Unity build batches:")
+        for library, library_batches in batches.items():
+            entry = {"library": library,
+                     "sources": sum(len(batch) for batch in library_batches),
+                     "batches": [[os.path.basename(source) for source in batch] for batch in library_batches]}
+            line = "  %-20s %3d sources in %2d batches" % (library, entry["sources"], len(library_batches))
+            if library in compile_seconds:
+                entry["compile_seconds"] = compile_seconds[library]
+                line += "  %8.1fs" % compile_seconds[library]
+                if baseline_seconds.get(library):
+                    entry["baseline_compile_seconds"] = baseline_seconds[library]
+                    line += " (normal build %.1fs, %+.0f%%)" % (
+                        baseline_seconds[library],
+                        (compile_seconds[library] - baseline_seconds[library]) / baseline_seconds[library] * 100)
+            libraries.append(entry)
+            self.output.info(line)
+
+        report = {"batch_size": self._unity_batch_size,
+                  "skipped_libraries": self._unity_skipped_libraries,
+                  "libraries": libraries}
+        tools.save(os.path.join(self.build_folder, "unity_build.json"), json.dumps(report, indent=2))
+
+    @property
+    def _build_stamp_file(self):
+        return os.path.join(self.build_folder, 'b2_build.sha256')
+
+    @property
+    def _build_hash(self):
+        """
+        Identifies the b2 build dir contents: the build flags (except the job count) plus the user-config.jam
+        """
+        flags = [flag for flag in self._build_flags if not flag.startswith('-j')]
+        sha256 = hashlib.sha256()
+        sha256.update(' '.join(flags).encode('utf-8'))
+        sha256.update(self._user_config_jam_contents.encode('utf-8'))
+        if self._unity_enabled:
+            sha256.update(("unity %s %s" % (self._unity_batch_size, self._unity_skipped_libraries)).encode('utf-8'))
+        return sha256.hexdigest()
+
+    def _can_reuse_build_dir(self):
+        if not self.options.incremental:
+            self.output.info('Incremental build: cleaning the build dir (incremental mode is disabled)')
+            return False
+
+        if self._pgo_enabled:
+            self.output.info('Incremental build: cleaning the build dir (PGO builds start from scratch)')
+            return False
+
+        if not os.path.isfile(self._build_stamp_file):
+            self.output.info('Incremental build: cleaning the build dir (no previous build found)')
+            return False
+
+        if tools.load(self._build_stamp_file).strip() != self._build_hash:
+            self.output.info('Incremental build: cleaning the build dir (build flags or user-config.jam changed)')
+            return False
+
+        self.output.info('Incremental build: reusing the build dir (build flags and user-config.jam unchanged)')
+        return True
+
+    def _write_build_stamp(self):
+        if self.options.incremental:
+            tools.save(self._build_stamp_file, self._build_hash)
+        elif os.path.isfile(self._build_stamp_file):
+            os.remove(self._build_stamp_file)
+
+    def _clean(self, keep_build_dir=False):
+        src = os.path.join(self.source_folder, self._source_subfolder)
+        clean_dirs = [] if keep_build_dir else [os.path.join(self.build_folder, "bin.v2"),
+                                                os.path.join(self.build_folder, "architecture")]
+        clean_dirs += [os.path.join(src, "dist", "bin"),
                       os.path.join(src, "stage"),
                       os.path.join(src, "tools", "build", "src", "engine", "bootstrap"),
                       os.path.join(src, "tools", "build", "src", "engine", "bin.ntx86"),
@@ -293,6 +1692,104 @@ class BoostConan(ConanFile):
                 self.output.warn('removing "%s"' % d)
                 shutil.rmtree(d)
 
+    def _compiler_launcher_counters(self):
+        """
+        Snapshot of the (hits, misses) counters of the compiler cache. They are totals over the cache lifetime, the
+        statistics of the build are the difference between two snapshots. None when unavailable
+        """
+        launcher = self._compiler_launcher
+        if not launcher:
+            return None
+
+        try:
+            with tools.environment_append(self._compiler_launcher_env):
+                if self._is_sccache:
+                    stats = json.loads(subprocess.check_output([launcher, "--show-stats", "--stats-format=json"]))
+                    stats = stats["stats"]
+                    return (sum(stats["cache_hits"]["counts"].values()),
+                            sum(stats["cache_misses"]["counts"].values()))
+
+                # Machine readable counters, ccache >= 3.7
+                output = subprocess.check_output([launcher, "--print-stats"]).decode()
+        except (OSError, subprocess.CalledProcessError, ValueError, KeyError) as exc:
+            self.output.warn("Unable to read the compiler cache counters: %s" % exc)
+            return None
+
+        counters = dict(line.split("\t", 1) for line in output.splitlines() if "\t" in line)
+        hits = int(counters.get("direct_cache_hit", 0)) + int(counters.get("preprocessed_cache_hit", 0))
+        return hits, int(counters.get("cache_miss", 0))
+
+    def _show_compiler_launcher_stats(self, counters_before):
+        launcher = self._compiler_launcher
+        if not launcher:
+            return
+
+        counters_after = self._compiler_launcher_counters()
+        if counters_before is None or counters_after is None:
+            self.output.warn("No compiler cache statistics for this build")
+            return
+
+        hits = counters_after[0] - counters_before[0]
+        misses = counters_after[1] - counters_before[1]
+        total = hits + misses
+        self.output.info("Compiler cache statistics of this build (%s): %d hits, %d misses, %.1f%% hit rate" %
+                         (launcher, hits, misses, hits * 100.0 / total if total else 0))
+
+    @staticmethod
+    def _sha256sum(file_name):
+        sha256 = hashlib.sha256()
+        with open(file_name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def _restore_cached_b2(self):
+        """
+        Copies the cached b2 engine in place of the bootstrap. Returns False when the bootstrap has to be run
+        """
+        if self.options.b2_cache != 'on':
+            return False
+
+        cache_dir = self._b2_cache_dir
+        cached_exe = os.path.join(cache_dir, os.path.basename(self._b2_exe))
+        checksum_file = cached_exe + '.sha256'
+        if not os.path.isfile(cached_exe) or not os.path.isfile(checksum_file):
+            self.output.info('No cached b2 engine in "%s"' % cache_dir)
+            return False
+
+        if self._sha256sum(cached_exe) != tools.load(checksum_file).strip():
+            self.output.warn('Checksum mismatch for the cached b2 engine "%s", bootstrapping again' % cached_exe)
+            return False
+
+        self.output.info('Using the cached b2 engine "%s"' % cached_exe)
+        shutil.copy2(cached_exe, self._b2_exe)
+        return True
+
+    def _store_cached_b2(self):
+        if self.options.b2_cache == 'off':
+            return
+
+        cache_dir = self._b2_cache_dir
+        cached_exe = os.path.join(cache_dir, os.path.basename(self._b2_exe))
+        tools.mkdir(cache_dir)
+        # Copy under a temporary name first, so a concurrent build never picks up a partially written engine
+        tmp_exe = cached_exe + '.tmp%d' % os.getpid()
+        shutil.copy2(self._b2_exe, tmp_exe)
+        os.replace(tmp_exe, cached_exe)
+        tools.save(cached_exe + '.sha256', self._sha256sum(cached_exe))
+        self.output.info('Stored the b2 engine in "%s"' % cached_exe)
+
+    @property
+    def _host_tools_env(self):
+        """
+        Clears the (possibly cross) compiler environment, for the tools running on the host
+        """
+        return {
+            'AS': None, 'AR': None, 'CC': None, 'CXX': None, 'LD': None, 'RANLIB': None,
+            'ARFLAGS': None, 'CFLAGS': None, 'CXXFLAGS': None,
+            'SYSROOT': None, 'CHOST': None, 'STRIP': None,
+        }
+
     def _bootstrap(self):
         """
         Bootstrap the b2 building engine from boost. It is host-specific and will be used to build the boost
@@ -306,14 +1803,8 @@ class BoostConan(ConanFile):
                 with tools.chdir(folder):
                     cmd = bootstrap
                     self.output.info(cmd)
-                    envs_to_null = {
-                        'AS': None, 'AR': None, 'CC': None, 'CXX': None, 'LD': None, 'RANLIB': None,
-                        'ARFLAGS': None, 'CFLAGS': None, 'CXXFLAGS': None,
-                        'SYSROOT': None, 'CHOST': None, 'STRIP': None,
-                    }
-
                     # To avoid using the CXX env vars we clear them out for the build.
-                    with tools.environment_append(envs_to_null):
+                    with tools.environment_append(self._host_tools_env):
                         self.run(cmd)
 
         except Exception as exc:
@@ -322,11 +1813,58 @@ class BoostConan(ConanFile):
                 self.output.warn(tools.load(os.path.join(folder, "bootstrap.log")))
             raise
 
-    def _write_user_config_jam(self):
+    @property
+    def _apple_target_flags(self):
+        flags = []
+        if tools.is_apple_os(self.settings.os):
+            if self.settings.compiler == "apple-clang":
+                flags.append("-isysroot %s" % tools.XCRun(self.settings).sdk_path)
+            if self.settings.get_safe("arch"):
+                flags.append("-arch %s" % tools.to_apple_arch(self.settings.arch))
+        return flags
+
+    @property
+    def _python_executable(self):
+        """
+        Interpreter Boost.Python is built for: BOOST_PYTHON_EXECUTABLE, the default python of the builder otherwise
+        """
+        if 'BOOST_PYTHON_EXECUTABLE' in os.environ:
+            return os.environ['BOOST_PYTHON_EXECUTABLE']
+        return tools.which("python3") or tools.which("python") or sys.executable
+
+    _python_config_cache = None
+
+    @property
+    def _python_config(self):
+        """
+        Version and NumPy include dir (None without NumPy) of the Boost.Python interpreter
+        """
+        if self._python_config_cache is not None:
+            return self._python_config_cache
+
+        script = "\n".join(["import sys",
+                            "print('%d.%d' % sys.version_info[:2])",
+                            "try:",
+                            "    import numpy",
+                            "    print(numpy.get_include())",
+                            "except ImportError:",
+                            "    pass"])
+        lines = subprocess.check_output([self._python_executable, "-c", script]).decode().splitlines()
+        self._python_config_cache = {"version": lines[0], "numpy_include": lines[1] if len(lines) > 1 else None}
+
+        if self._python_config_cache["numpy_include"]:
+            self.output.info("Building boost_python and boost_numpy for Python %s, NumPy headers in %s" %
+                             (lines[0], self._python_config_cache["numpy_include"]))
+        else:
+            self.output.warn("NumPy not found for %s, building boost_python without boost_numpy" %
+                             self._python_executable)
+        return self._python_config_cache
+
+    @property
+    def _user_config_jam_contents(self):
         """
         Sets up the boost dependencies and compiler settings
         """
-        self.output.info('Writing the user-config.jam file')
         contents = ''
 
         def create_library_config(deps_name, name):
@@ -343,19 +1881,26 @@ class BoostConan(ConanFile):
                                           libdir=libdir,
                                           lib=lib)
 
-        if self._zip_bzip2_requires_needed:
-            contents += create_library_config('zlib', 'zlib')
-            contents += create_library_config('bzip2', 'bzip2')
+        for deps_name, name in self._iostreams_dependencies.items():
+            contents += create_library_config(deps_name, name)
+
+        if not self.options.without_python:
+            # b2 builds boost_numpy as well when the interpreter imports numpy
+            contents += '\nusing python : %s : "%s" ;' % (self._python_config["version"],
+                                                         self._python_executable.replace("\\", "/"))
 
         # Specify here the toolset with the binary if present if don't empty parameter :
         contents += '\nusing "%s" : %s : ' % (self._toolset, self._toolset_version)
+        if self._build_timing_enabled:
+            contents += ' "%s" "%s"' % (self._build_timer_python.replace("\\", "/"),
+                                        self._build_timer_script.replace("\\", "/"))
+        if self._compiler_launcher:
+            # b2 treats the command as a list of tokens, so the launcher simply wraps the compiler
+            contents += ' "%s"' % self._compiler_launcher.replace("\\", "/")
         contents += ' "%s"' % self._cxx.replace("\\", "/")
 
-        if tools.is_apple_os(self.settings.os):
-            if self.settings.compiler == "apple-clang":
-                contents += " -isysroot %s" % tools.XCRun(self.settings).sdk_path
-            if self.settings.get_safe("arch"):
-                contents += " -arch %s" % tools.to_apple_arch(self.settings.arch)
+        for flag in self._apple_target_flags:
+            contents += " %s" % flag
 
         contents += " : \n"
 
@@ -378,6 +1923,11 @@ class BoostConan(ConanFile):
             contents += '<asmflags>"%s" ' % self._as_flags
 
         contents += " ;"
+        return contents
+
+    def _write_user_config_jam(self):
+        self.output.info('Writing the user-config.jam file')
+        contents = self._user_config_jam_contents
 
         # Finally - write the config
         self.output.warn(contents)
@@ -480,8 +2030,17 @@ class BoostConan(ConanFile):
         if self._b2_abi:
             flags.append("abi=%s" % self._b2_abi)
 
-        if self.options.layout is not "b2-default":
+        if self._multi_config_variants and (self.options.layout == "system" or
+                                            (self.options.layout == "b2-default" and self.settings.os != "Windows")):
+            # The system layout, the b2 default outside of Windows, gives the same file names to the debug and release
+            # libraries
+            self.output.warn("Using the tagged layout to build several variants at once")
+            flags.append("--layout=tagged")
+        elif self.options.layout is not "b2-default":
             flags.append("--layout=%s" % self.options.layout)
+        if self._multi_config_variants:
+            # The installed BoostConfig files point at lib/, where the libraries no longer are once split per variant
+            flags.append("--no-cmake-config")
 
         flags.append("--user-config=%s" % os.path.join(self._boost_build_dir, 'user-config.jam'))
 
@@ -489,9 +2048,14 @@ class BoostConan(ConanFile):
             for define in self.deps_cpp_info[library].defines:
                 flags.append("define=%s" % define)
 
+        for deps_name in self._iostreams_dependencies:
+            add_defines(deps_name)
         if self._zip_bzip2_requires_needed:
-            add_defines('zlib')
-            add_defines('bzip2')
+            # Without these, b2 builds the filters against whatever lzma/zstd the builder has installed
+            if not self.options.iostreams_lzma:
+                flags.append("-sNO_LZMA=1")
+            if not self.options.iostreams_zstd:
+                flags.append("-sNO_ZSTD=1")
 
         if self._is_msvc and self.settings.compiler.runtime:
             flags.append('runtime-link=%s' % ('static' if 'MT' in str(self.settings.compiler.runtime) else 'shared'))
@@ -500,8 +2064,21 @@ class BoostConan(ConanFile):
         flags.append("threading=%s" % ("single" if not self.options.multithreading else "multi" ))
         flags.append("visibility=%s" % self.options.visibility)
 
-        flags.append("link=%s" % ("static" if not self.options.shared else "shared"))
-        if self.settings.build_type == "Debug":
+        if self._multi_config_variants:
+            # A single b2 run shares the jam parsing and the dependency scanning between the variants
+            links = sorted(set(link for _, link in self._multi_config_variants))
+            flags.append("link=%s" % ",".join(links))
+        else:
+            flags.append("link=%s" % ("static" if not self.options.shared else "shared"))
+
+        if self.options.lto != 'off':
+            flags.append("lto=on")
+            if not self._is_msvc:
+                flags.append("lto-mode=%s" % self._lto_mode)
+        if self._multi_config_variants:
+            build_types = sorted(set(build_type.lower() for build_type, _ in self._multi_config_variants))
+            flags.append("variant=%s" % ",".join(build_types))
+        elif self.settings.build_type == "Debug":
             flags.append("variant=debug")
         else:
             flags.append("variant=release")
@@ -533,11 +2110,17 @@ class BoostConan(ConanFile):
             if self.options.fPIC:
                 cxx_flags.append("-fPIC")
 
-        if self.settings.build_type == "RelWithDebInfo":
+        if self._is_msvc and self._debug_info != 'embedded':
+            # PDB files instead of the debug info in every object file
+            flags.extend(["debug-symbols=on", "debug-store=database"])
+        elif self.settings.build_type == "RelWithDebInfo" and not self._multi_config_variants:
+            # The multi_config variants are plain debug and release builds, whatever the build_type setting
             if self.settings.compiler == "gcc" or "clang" in str(self.settings.compiler):
                 cxx_flags.append("-g")
             elif self.settings.compiler == "Visual Studio":
                 cxx_flags.append("/Z7")
+        if self._debug_info == 'split' and not self._is_msvc:
+            cxx_flags.append("-gsplit-dwarf")
 
         # Standalone toolchain fails when declare the std lib
         if self.settings.os not in ["Android", "Emscripten"]:
@@ -564,8 +2147,15 @@ class BoostConan(ConanFile):
             flags.append("define=BOOST_FILESYSTEM_NO_DEPRECATED=1")
         if self.options.segmented_stacks:
             flags.extend(["segmented-stacks=on",
-                          "define=BOOST_USE_SEGMENTED_STACKS=1",
-                          "define=BOOST_USE_UCONTEXT=1"])
+                          "define=BOOST_USE_SEGMENTED_STACKS=1"])
+        if self._context_impl:
+            flags.append("context-impl=%s" % self._context_impl)
+        if self.options.context_valgrind:
+            flags.append("valgrind=on")
+        for define in self._context_defines:
+            flags.append("define=%s=1" % define)
+        for define in self._log_defines:
+            flags.append("define=%s" % define)
 
         if tools.is_apple_os(self.settings.os):
             if self.settings.get_safe("os.version"):
@@ -589,7 +2179,7 @@ class BoostConan(ConanFile):
         if self.options.extra_b2_flags:
             flags.append(str(self.options.extra_b2_flags))
 
-        flags.extend(["install", "--prefix=%s" % self.package_folder, "-j%s" % tools.cpu_count(), "--abbreviate-paths"])
+        flags.extend(["install", "--prefix=%s" % self.package_folder, "-j%s" % self._job_limits[0], "--abbreviate-paths"])
         if self.options.debug_level:
             flags.append("-d%d" % self.options.debug_level)
         return flags
@@ -619,98 +2209,596 @@ class BoostConan(ConanFile):
         return flags
 
     def package(self):
+        with self._recipe_phase("package", profile=True):
+            self._package()
+        if self._pch_enabled:
+            if not hasattr(self, "platform_inspector"):
+                # Not created by build() for header only packages, nor when package() runs on its own
+                self._create_platform_inspector()
+            with self._recipe_phase("precompiled_headers"):
+                self._build_precompiled_headers()
+        if self._recipe_profile:
+            self._write_recipe_profile(self.build_folder)
+
+    def _package(self):
         self.copy("LICENSE_1_0.txt", dst="licenses", src=os.path.join(self.source_folder,
                                                                       self._source_subfolder))
 
-        if self.options.header_only:
+        if self._use_bcp:
+            # Replace the full header tree installed by b2 with the bcp subset
+            headers_dir = os.path.join(self.package_folder, self._package_headers_dir)
+            if os.path.isdir(headers_dir):
+                shutil.rmtree(headers_dir)
+            self.copy(pattern="*", dst=self._package_headers_dir, src=os.path.join(self._bcp_dir, "boost"))
+        elif self.options.header_only:
             self.copy(pattern="*", dst="include/boost", src="%s/boost" % self._boost_dir)
 
-    def package_info(self):
-        gen_libs = [] if self.options.header_only else tools.collect_libs(self)
+        # Keep the PGO profile with the binaries it was used for, so the build can be reproduced
+        self.copy(pattern="*.gcda", dst="pgo", src=self._pgo_profile_folder)
+        self.copy(pattern="*.profdata", dst="pgo", src=self._pgo_profile_folder)
 
-        if self._is_versioned_layout:
-            version_tokens = str(self.version).split(".")
-            if len(version_tokens) >= 2:
-                major = version_tokens[0]
-                minor = version_tokens[1]
-                boost_version_tag = "boost-%s_%s" % (major, minor)
-                self.cpp_info.includedirs = [os.path.join(self.package_folder, "include", boost_version_tag)]
-
-        # List of lists, so if more than one matches the lib like serialization and wserialization
-        # both will be added to the list
-        ordered_libs = [[] for _ in range(len(LIB_LIST))]
-
-        # The order is important, reorder following the LIB_LIST order
-        missing_order_info = []
-        for real_lib_name in gen_libs:
-            for pos, alib in enumerate(LIB_LIST):
-                if os.path.splitext(real_lib_name)[0].split("-")[0].endswith(alib):
-                    ordered_libs[pos].append(real_lib_name)
-                    break
+        if not self.options.header_only:
+            if self._multi_config_variants:
+                self._split_multi_config_libraries()
+                for build_type, link in self._multi_config_variants:
+                    self._write_library_manifest(self._multi_config_lib_folder(build_type, link), build_type, link)
             else:
-                # self.output.info("Missing in order: %s" % real_lib_name)
-                if "_exec_monitor" not in real_lib_name:  # https://github.com/bincrafters/community/issues/94
-                    missing_order_info.append(real_lib_name)  # Assume they do not depend on other
+                self._write_library_manifest("lib", str(self.settings.build_type),
+                                             "shared" if self.options.shared else "static")
+            self._check_stacktrace_backend()
+
+        if self._debug_info != 'embedded':
+            self._package_debug_info()
+
+        self.copy(pattern="build_profile.json", src=self.build_folder, keep_path=False)
+
+    @property
+    def _has_debug_info(self):
+        return self.settings.build_type in ["Debug", "RelWithDebInfo"] or bool(self._multi_config_variants)
+
+    @property
+    def _debug_info(self):
+        """
+        Where the debug info goes: embedded in the binaries, split in .dwo files packed in a .dwp per shared library (PDB
+        files with msvc) or moved out of the shared libraries to separate .debug files
+        """
+        debug_info = str(self.options.debug_info)
+        if debug_info == 'embedded' or not self._has_debug_info:
+            return 'embedded'
+        if not self._is_msvc and self._b2_binary_format != "elf":
+            self.output.warn("debug_info=%s needs ELF binaries, keeping the debug info embedded" % debug_info)
+            return 'embedded'
+        return debug_info
+
+    def _binutil(self, name):
+        """
+        Binary tool next to the compiler (x86_64-linux-gnu-g++ -> x86_64-linux-gnu-objcopy), on the PATH otherwise.
+        The <NAME> environment variable takes precedence
+        """
+        if name.upper() in os.environ:
+            return os.environ[name.upper()]
+
+        cxx_dir, cxx_name = os.path.split(self._cxx)
+        for compiler in ["g++", "clang++"]:
+            if compiler in cxx_name:
+                prefixed = cxx_name.split(compiler)[0] + name
+                path = os.path.join(cxx_dir, prefixed) if cxx_dir else tools.which(prefixed)
+                if path and os.path.isfile(path):
+                    return path
+        return tools.which(name)
+
+    def _packaged_libraries(self):
+        lib_folder = os.path.join(self.package_folder, "lib")
+        for root, _, files in os.walk(lib_folder):
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                if not os.path.islink(path) and re.search(r"\.(a|so(\.[0-9.]+)?)$", file_name):
+                    yield path
+
+    def _package_debug_info(self):
+        """
+        Moves the debug info out of the way of the release consumers linking the libraries: to the debug folder of the
+        package with msvc, next to the shared libraries otherwise
+        """
+        if self._is_msvc:
+            self.copy(pattern="*.pdb", dst="debug", src=self.build_folder, keep_path=False, excludes="pgo/*")
+            return
 
-        # Flat the list and append the missing order
-        self.cpp_info.libs = [item for sublist in ordered_libs
-                                      for item in sublist if sublist] + missing_order_info
+        if self._debug_info == 'split':
+            # The skeleton debug info of a library refers to the .dwo files by their absolute path in the build folder:
+            # they are packed in a <library>.dwp file next to it, where gdb and lldb look for it
+            dwp = self._binutil("llvm-dwp" if "clang" in str(self.settings.compiler) else "dwp") or \
+                self._binutil("dwp")
+            if not dwp:
+                raise ConanInvalidConfiguration("dwp is required for debug_info=split")
+            gdb_add_index = tools.which("gdb-add-index")
+            for library in self._packaged_libraries():
+                if ".so" not in os.path.basename(library):
+                    continue
+                self.run('"%s" -e "%s" -o "%s.dwp"' % (dwp, library, library))
+                if self._linker_supports_gdb_index:
+                    # gold, lld and mold wrote the index at link time
+                    continue
+                if gdb_add_index:
+                    self.run('"%s" "%s"' % (gdb_add_index, library))
+                else:
+                    self.output.warn("gdb-add-index not found, %s has no .gdb_index" % os.path.basename(library))
+            return
+
+        objcopy = self._binutil("objcopy")
+        if not objcopy:
+            raise ConanInvalidConfiguration("objcopy is required for debug_info=separate")
+        for library in self._packaged_libraries():
+            if ".so" not in os.path.basename(library):
+                continue
+            # gdb and lldb follow the debug link to <library dir>/.debug/<name>.debug without any configuration
+            library_debug_folder = os.path.join(os.path.dirname(library), ".debug")
+            tools.mkdir(library_debug_folder)
+            debug_file = os.path.join(library_debug_folder, os.path.basename(library) + ".debug")
+            self.run('"%s" --only-keep-debug "%s" "%s"' % (objcopy, library, debug_file))
+            self.run('"%s" --strip-debug --add-gnu-debuglink="%s" "%s"' % (objcopy, debug_file, library))
+        self.output.info("Moved the debug info of the shared libraries to .debug folders next to them")
+
+    @property
+    def _multi_config_variants(self):
+        """
+        (build_type, link) pairs built at once with the multi_config option
+        """
+        multi_config = str(self.options.multi_config)
+        if multi_config == 'none' or self.options.header_only:
+            return []
+
+        if multi_config == 'build_type_link':
+            links = ['static', 'shared']
+        else:
+            links = ['shared' if self.options.shared else 'static']
+        return [(build_type, link) for build_type in ['Debug', 'Release'] for link in links]
+
+    @staticmethod
+    def _multi_config_lib_folder(build_type, link):
+        return os.path.join("lib", "%s-%s" % (build_type, link))
+
+    @staticmethod
+    def _tagged_library_variant(file_name):
+        """
+        (build_type, link) of a library file from its tagged/versioned layout name, e.g.
+        libboost_regex-mt-d-x64.a -> (Debug, static), boost_regex-vc142-mt-x64-1_75.dll -> (Release, shared)
+        """
+        tokens = file_name.split(".")[0].split("-")[1:]
+        # The ABI tag is made of the s, g, y, d, p and n letters, d meaning a debug build
+        debug = any(re.match(r"^[sgydpn]+$", token) and "d" in token for token in tokens)
+        static = file_name.endswith(".a") or (file_name.endswith(".lib") and file_name.startswith("lib"))
+        return ("Debug" if debug else "Release"), ("static" if static else "shared")
+
+    def _split_multi_config_libraries(self):
+        lib_folder = os.path.join(self.package_folder, "lib")
+        for build_type, link in self._multi_config_variants:
+            tools.mkdir(os.path.join(self.package_folder, self._multi_config_lib_folder(build_type, link)))
+
+        for file_name in os.listdir(lib_folder):
+            path = os.path.join(lib_folder, file_name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                continue
+            build_type, link = self._tagged_library_variant(file_name)
+            destination = os.path.join(self.package_folder, self._multi_config_lib_folder(build_type, link))
+            if not os.path.isdir(destination):
+                self.output.warn("Unexpected library %s for the %s %s variant" % (file_name, build_type, link))
+                continue
+            os.rename(path, os.path.join(destination, file_name))
+
+    def _library_manifest_file(self, lib_folder):
+        return os.path.join(self.package_folder, lib_folder, "boost_libraries.json")
+
+    def _scan_libraries(self, lib_folder):
+        """
+        Link name -> file name of the libraries installed in a package lib folder
+        """
+        lib_folder = os.path.join(self.package_folder, lib_folder)
+        libraries = OrderedDict()
+        if not os.path.isdir(lib_folder):
+            return libraries
+
+        for file_name in sorted(os.listdir(lib_folder)):
+            name, ext = os.path.splitext(file_name)
+            if ext not in [".a", ".lib", ".so", ".dylib"]:
+                continue
+            if ext != ".lib" and name.startswith("lib"):
+                name = name[len("lib"):]
+            libraries.setdefault(name, file_name)
+        return libraries
+
+    @staticmethod
+    def _link_order(components):
+        """
+        Sorts the component names so every library comes before the ones it depends on
+        """
+        ordered = []
+
+        def visit(name):
+            if name in ordered or name not in components:
+                return
+            for dependency in LIB_DEPENDENCIES.get(name, []):
+                visit(dependency)
+            ordered.append(name)
+
+        for component in components:
+            visit(component)
+        return list(reversed(ordered))
+
+    def _write_library_manifest(self, lib_folder, build_type, link):
+        """
+        Records the packaged libraries, so package_info does not have to scan and guess on every install
+        """
+        libraries = self._scan_libraries(lib_folder)
+        components = self._components_from_libs(libraries.keys())
+        entries = []
+        for name in self._link_order(components):
+            for lib in components[name]:
+                entries.append({"name": name,
+                                "link_name": lib,
+                                "file": libraries[lib],
+                                "link_order": len(entries)})
+
+        manifest = {"version": 1,
+                    "variant": {"build_type": build_type,
+                                "link": link,
+                                "layout": str(self.options.layout)},
+                    "libraries": entries}
+        tools.save(self._library_manifest_file(lib_folder), json.dumps(manifest, indent=2))
+        self.output.info("Wrote the %s library manifest with %d libraries" % (lib_folder, len(entries)))
+
+    def _library_component(self, lib):
+        """
+        Logical component of a packaged library file name: boost_regex-mt-x64 -> regex, boost_python38 -> python
+        """
+        name = os.path.splitext(lib)[0].split("-")[0]
+        for prefix in ["libboost_", "boost_"]:
+            if name.startswith(prefix):
+                name = name[len(prefix):]
+                break
+
+        for versioned in ["mpi_python", "python", "numpy"]:
+            if name.startswith(versioned) and name[len(versioned):].isdigit():
+                return versioned
+        return name
+
+    def _components_from_libs(self, libs):
+        """
+        Link names of the libraries grouped by component
+        """
+        components = OrderedDict()
+        for lib in libs:
+            if "_exec_monitor" in lib:  # https://github.com/bincrafters/community/issues/94
+                continue
+            components.setdefault(self._library_component(lib), []).append(lib)
 
         if self.options.without_test:  # remove boost_unit_test_framework
-            self.cpp_info.libs = [lib for lib in self.cpp_info.libs if "unit_test" not in lib]
+            components.pop("unit_test_framework", None)
 
-        self.output.info("LIBRARIES: %s" % self.cpp_info.libs)
-        self.output.info("Package folder: %s" % self.package_folder)
+        return components
+
+    def _collect_components(self, lib_folder="lib"):
+        """
+        Library files of each component, from the manifest written at package time or scanning the lib folder for
+        packages that predate it
+        """
+        manifest_file = self._library_manifest_file(lib_folder)
+        if os.path.isfile(manifest_file):
+            manifest = json.loads(tools.load(manifest_file))
+            components = OrderedDict()
+            for entry in sorted(manifest["libraries"], key=lambda e: e["link_order"]):
+                components.setdefault(entry["name"], []).append(entry["link_name"])
+            return components
+
+        self.output.warn("No library manifest in the package, scanning the lib folder")
+        return self._components_from_libs(tools.collect_libs(self, folder=lib_folder))
+
+    @property
+    def _stacktrace_backend(self):
+        """
+        The stacktrace_<backend> library exposed to the consumers, None to expose all the built ones
+        """
+        if self.options.without_stacktrace or self.options.stacktrace_backend == 'default':
+            return None
+        return str(self.options.stacktrace_backend)
+
+    def _check_stacktrace_backend(self):
+        if not self._stacktrace_backend:
+            return
+        lib_folders = [self._multi_config_lib_folder(build_type, link)
+                       for build_type, link in self._multi_config_variants] or ["lib"]
+        for lib_folder in lib_folders:
+            if "stacktrace_%s" % self._stacktrace_backend not in self._collect_components(lib_folder):
+                # b2 silently skips the backends its configuration checks fail for (no backtrace.h, no addr2line)
+                raise ConanInvalidConfiguration("boost_stacktrace_%s was not built, the %s backend is not available "
+                                                "with this compiler" % (self._stacktrace_backend,
+                                                                        self._stacktrace_backend))
+
+    def _select_stacktrace_backend(self, components):
+        """
+        Drops the stacktrace libraries of the other backends, the consumers must link a single one
+        """
+        if not self._stacktrace_backend:
+            return components
+        return OrderedDict((name, libs) for name, libs in components.items()
+                           if not name.startswith("stacktrace_") or name == "stacktrace_%s" % self._stacktrace_backend)
+
+    @property
+    def _stacktrace_defines(self):
+        if not self._stacktrace_backend:
+            return []
+        defines = [] if self.options.header_only else ["BOOST_STACKTRACE_LINK"]
+        if self._stacktrace_backend != 'basic':
+            defines.append("BOOST_STACKTRACE_USE_%s" % self._stacktrace_backend.upper())
+        return defines
+
+    def _component_system_libs(self, name):
+        if self.settings.os == "Linux":
+            if name == "stacktrace_backtrace":
+                return ["dl", "backtrace"]
+            if name.startswith("stacktrace_"):
+                return ["dl"]
+        elif self.settings.os == "Windows":
+            if name == "log":
+                return ["ws2_32", "mswsock"]
+            if name.startswith("stacktrace_windbg"):
+                return ["ole32", "dbgeng"]
+        return []
+
+    @property
+    def _log_defines(self):
+        """
+        Boost.Log configuration macros, they change the library ABI so the consumers get them as well
+        """
+        if self.options.without_log:
+            return []
+
+        defines = [define for feature, define in LOG_FEATURES.items() if not getattr(self.options, "log_%s" % feature)]
+        if not self.options.multithreading:
+            defines.append("BOOST_LOG_NO_THREADS")
+        return defines
+
+    def _component_requires(self, name, components):
+        """
+        The packaged libraries a component links with, leaving out the ones its trimmed features do not use
+        """
+        unused = []
+        if name in ["log", "log_setup"]:
+            if not self.options.log_settings_parsers:
+                # Only the filter and formatter parsers use Boost.Regex
+                unused.append("regex")
+            if not self.options.multithreading:
+                unused.append("thread")
+
+        return [dep for dep in LIB_DEPENDENCIES.get(name, []) if dep in components and dep not in unused]
+
+    @property
+    def _context_impl(self):
+        """
+        Boost.Context implementation of the context-impl b2 feature, None for the b2 default (fcontext)
+        """
+        context_impl = str(self.options.context_impl)
+        if context_impl == 'default':
+            # Segmented stacks only exist with ucontext
+            return 'ucontext' if self.options.segmented_stacks else None
+        return context_impl
+
+    @property
+    def _context_defines(self):
+        """
+        Macros selecting the Boost.Context implementation in the headers, the libraries and their consumers must agree
+        """
+        defines = []
+        if self._context_impl == 'ucontext':
+            defines.append("BOOST_USE_UCONTEXT")
+        elif self._context_impl == 'winfib':
+            defines.append("BOOST_USE_WINFIB")
+        if self.options.context_valgrind:
+            defines.append("BOOST_USE_VALGRIND")
+        return defines
 
+    @property
+    def _context_stack_allocator(self):
+        return {'fixedsize': 'fixedsize_stack',
+                'protected': 'protected_fixedsize_stack',
+                'pooled': 'pooled_fixedsize_stack'}[str(self.options.context_stack_allocator)]
+
+    @property
+    def _context_stack_allocator_define(self):
+        # Not a Boost macro: the allocator class the consumers can pick, e.g.
+        # boost::fibers::CONAN_BOOST_STACK_ALLOCATOR
+        return "CONAN_BOOST_STACK_ALLOCATOR=%s" % self._context_stack_allocator
+
+    @property
+    def _consumer_defines(self):
+        """
+        Defines the consumers of the package have to use, also used to build the precompiled headers
+        """
+        defines = []
         if not self.options.header_only and self.options.shared:
-            self.cpp_info.defines.append("BOOST_ALL_DYN_LINK")
+            defines.append("BOOST_ALL_DYN_LINK")
 
         if self.options.system_no_deprecated:
-            self.cpp_info.defines.append("BOOST_SYSTEM_NO_DEPRECATED")
+            defines.append("BOOST_SYSTEM_NO_DEPRECATED")
 
         if self.options.asio_no_deprecated:
-            self.cpp_info.defines.append("BOOST_ASIO_NO_DEPRECATED")
+            defines.append("BOOST_ASIO_NO_DEPRECATED")
 
         if self.options.filesystem_no_deprecated:
-            self.cpp_info.defines.append("BOOST_FILESYSTEM_NO_DEPRECATED")
+            defines.append("BOOST_FILESYSTEM_NO_DEPRECATED")
 
         if self.options.segmented_stacks:
-            self.cpp_info.defines.extend(["BOOST_USE_SEGMENTED_STACKS", "BOOST_USE_UCONTEXT"])
+            defines.append("BOOST_USE_SEGMENTED_STACKS")
+        defines.extend(self._context_defines)
+        defines.extend(self._stacktrace_defines)
+
+        defines.extend(self._log_defines)
 
         if self.settings.os != "Android":
             if self._gnu_cxx11_abi:
-                self.cpp_info.defines.append("_GLIBCXX_USE_CXX11_ABI=%s" % self._gnu_cxx11_abi)
+                defines.append("_GLIBCXX_USE_CXX11_ABI=%s" % self._gnu_cxx11_abi)
 
         if not self.options.header_only:
             if self.options.error_code_header_only:
-                self.cpp_info.defines.append("BOOST_ERROR_CODE_HEADER_ONLY")
+                defines.append("BOOST_ERROR_CODE_HEADER_ONLY")
 
             if self.options.shared:
-                self.cpp_info.defines.append("BOOST_ALL_DYN_LINK")
+                defines.append("BOOST_ALL_DYN_LINK")
             else:
-                self.cpp_info.defines.append("BOOST_USE_STATIC_LIBS")
-                if not self.options.without_python:
-                    self.cpp_info.defines.append("BOOST_PYTHON_STATIC_LIB")
+                defines.append("BOOST_USE_STATIC_LIBS")
 
             if self._is_msvc or self._is_clang_cl:
                 if not self.options.magic_autolink:
                     # DISABLES AUTO LINKING! NO SMART AND MAGIC DECISIONS THANKS!
-                    self.cpp_info.defines.append("BOOST_ALL_NO_LIB")
-                    self.output.info("Disabled magic autolinking (smart and magic decisions)")
+                    defines.append("BOOST_ALL_NO_LIB")
                 else:
                     if self.options.layout == "system":
-                        self.cpp_info.defines.append("BOOST_AUTO_LINK_SYSTEM")
+                        defines.append("BOOST_AUTO_LINK_SYSTEM")
                     elif self.options.layout == "tagged":
-                        self.cpp_info.defines.append("BOOST_AUTO_LINK_TAGGED")
+                        defines.append("BOOST_AUTO_LINK_TAGGED")
+        else:
+            if self.options.error_code_header_only:
+                defines.append("BOOST_ERROR_CODE_HEADER_ONLY")
+                defines.append("BOOST_SYSTEM_NO_LIB")
+
+        if str(self.settings.os) in ['watchOS', 'tvOS']:
+            # 'sigaltstack' is unavailable: not available on tvOS / watchOS
+            defines.append("BOOST_TEST_DISABLE_ALT_STACK=1")
+
+        return defines
+
+    def _package_info_multi_config(self):
+        """
+        Per build type libraries of a multi_config package, for the multi-config generators. Conan components have no
+        per build type information, so these packages expose the libraries at the root level
+        """
+        link = "shared" if self.options.shared else "static"
+        for build_type in ["Debug", "Release"]:
+            lib_folder = self._multi_config_lib_folder(build_type, link)
+            components = self._select_stacktrace_backend(self._collect_components(lib_folder))
+            config = getattr(self.cpp_info, build_type.lower())
+            config.libdirs = [lib_folder]
+            config.bindirs = [lib_folder]
+            config.libs = [lib for name in self._link_order(components) for lib in components[name]]
+            self.output.info("%s LIBRARIES: %s" % (build_type, config.libs))
+            for name in components:
+                for system_lib in self._component_system_libs(name):
+                    if system_lib not in self.cpp_info.system_libs:
+                        self.cpp_info.system_libs.append(system_lib)
+            if "python" in components and not self.options.shared:
+                config.defines.append("BOOST_PYTHON_STATIC_LIB")
+            if "context" in components or "fiber" in components:
+                config.defines.append(self._context_stack_allocator_define)
+
+    def package_info(self):
+        with self._recipe_phase("package_info", profile=True):
+            self._package_info()
+        # The build folder of the report is only known when the package was built in this process
+        if self._recipe_profile and RECIPE_PROFILE["report_folder"]:
+            self._write_recipe_profile(RECIPE_PROFILE["report_folder"])
+
+    def _package_info(self):
+        if self._multi_config_variants:
+            self._package_info_multi_config()
+            headers = self.cpp_info
+        else:
+            # Compiled libraries are modeled as components (Boost::regex, Boost::log, ...) requiring only their own
+            # dependencies. Everything common lives in the "headers" component every other one requires
+            headers = self.cpp_info.components["headers"]
+            headers.names["cmake_find_package"] = "headers"
+            headers.names["cmake_find_package_multi"] = "headers"
+            headers.bindirs.append("lib")
+
+        if self._is_versioned_layout:
+            version_tokens = str(self.version).split(".")
+            if len(version_tokens) >= 2:
+                major = version_tokens[0]
+                minor = version_tokens[1]
+                boost_version_tag = "boost-%s_%s" % (major, minor)
+                headers.includedirs = [os.path.join(self.package_folder, "include", boost_version_tag)]
+
+        components = OrderedDict()
+        if not self.options.header_only and not self._multi_config_variants:
+            components = self._select_stacktrace_backend(self._collect_components())
+        for name, libs in components.items():
+            component = self.cpp_info.components[name]
+            component.names["cmake_find_package"] = name
+            component.names["cmake_find_package_multi"] = name
+            component.libs = libs
+            component.requires = ["headers"] + self._component_requires(name, components)
+            component.system_libs = self._component_system_libs(name)
+            component.bindirs.append("lib")
+
+        if "iostreams" in components and self._zip_bzip2_requires_needed:
+            self.cpp_info.components["iostreams"].requires.extend("%s::%s" % (dependency, dependency)
+                                                                  for dependency in self._iostreams_dependencies)
+
+        if "python" in components and not self.options.shared:
+            self.cpp_info.components["python"].defines.append("BOOST_PYTHON_STATIC_LIB")
+
+        for name in ["context", "fiber"]:
+            if name in components:
+                self.cpp_info.components[name].defines.append(self._context_stack_allocator_define)
+        if not self.options.without_context:
+            self.user_info.context_stack_allocator = self._context_stack_allocator
+
+        self.output.info("LIBRARIES: %s" % ["%s: %s" % (name, libs) for name, libs in components.items()])
+        self.output.info("Package folder: %s" % self.package_folder)
+
+        headers.defines = self._consumer_defines
+
+        pch_manifest = os.path.join(self.package_folder, "pch", "boost-pch.json")
+        if os.path.isfile(pch_manifest):
+            # Opt-in: CMake consumers include(boost-pch) and call boost_target_precompiled_headers(<target> <header>)
+            pch = json.loads(tools.load(pch_manifest))
+            pch_dir = os.path.join(self.package_folder, "pch")
+            headers.builddirs.append("pch")
+            headers.build_modules["cmake_find_package"].append(os.path.join("pch", "boost-pch.cmake"))
+            headers.build_modules["cmake_find_package_multi"].append(os.path.join("pch", "boost-pch.cmake"))
+            self.user_info.pch_dir = pch_dir
+            self.user_info.pch_headers = ";".join(pch["headers"])
+            self.user_info.pch_flags = pch["flags"]
+
+        if self.options.header_only and self._stacktrace_backend not in [None, 'noop']:
+            # The header only backends need the same system libraries as their compiled counterparts, the basic one
+            # being windbg on Windows
+            backend = self._stacktrace_backend
+            if backend == 'basic' and self.settings.os == "Windows":
+                backend = 'windbg'
+            headers.system_libs.extend(self._component_system_libs("stacktrace_%s" % backend))
+
+        if not self.options.header_only:
+            if not self.options.shared and self.options.lto != 'off':
+                # Static archives hold LTO bytecode: consumers have to link with LTO as well, which also gives them
+                # cross-module inlining into the boost code
+                if self._is_msvc:
+                    headers.sharedlinkflags.append("/LTCG")
+                    headers.exelinkflags.append("/LTCG")
+                else:
+                    lto_flag = "-flto=thin" if self._lto_mode == 'thin' else "-flto"
+                    headers.cxxflags.append(lto_flag)
+                    headers.sharedlinkflags.append(lto_flag)
+                    headers.exelinkflags.append(lto_flag)
+
+            if not self.options.shared:
+                # Consumers linking the static libraries are the ones dropping their unused sections
+                linker_flags = self._consumer_linker_flags
+                headers.sharedlinkflags.extend(linker_flags)
+                headers.exelinkflags.extend(linker_flags)
+
+            if self._is_msvc or self._is_clang_cl:
+                if not self.options.magic_autolink:
+                    self.output.info("Disabled magic autolinking (smart and magic decisions)")
+                else:
                     self.output.info("Enabled magic autolinking (smart and magic decisions)")
 
                 # https://github.com/conan-community/conan-boost/issues/127#issuecomment-404750974
-                self.cpp_info.system_libs.append("bcrypt")
+                headers.system_libs.append("bcrypt")
             elif self.settings.os == "Linux":
                 # https://github.com/conan-community/community/issues/135
-                self.cpp_info.system_libs.append("rt")
+                headers.system_libs.append("rt")
                 if self.options.multithreading:
-                    self.cpp_info.system_libs.append("pthread")
+                    headers.system_libs.append("pthread")
             elif self.settings.os == "Emscripten":
                 if self.options.multithreading:
                     arch = self.settings.get_safe('arch')
@@ -720,26 +2808,27 @@ class BoostConan(ConanFile):
                     # So instead we are using the raw compiler flags (that are being activated
                     # from the aformentioned flag)
                     if arch.startswith("x86") or arch.startswith("wasm"):
-                        self.cpp_info.cxxflags.append("-pthread")
-                        self.cpp_info.sharedlinkflags.extend(["-pthread","--shared-memory"])
-                        self.cpp_info.exelinkflags.extend(["-pthread","--shared-memory"])
-        else:
-            if self.options.error_code_header_only:
-                self.cpp_info.defines.append("BOOST_ERROR_CODE_HEADER_ONLY")
-                self.cpp_info.defines.append("BOOST_SYSTEM_NO_LIB")
-
-        if str(self.settings.os) in ['watchOS', 'tvOS']:
-            # 'sigaltstack' is unavailable: not available on tvOS / watchOS
-            self.cpp_info.defines.append("BOOST_TEST_DISABLE_ALT_STACK=1")
+                        headers.cxxflags.append("-pthread")
+                        headers.sharedlinkflags.extend(["-pthread","--shared-memory"])
+                        headers.exelinkflags.extend(["-pthread","--shared-memory"])
 
         boost_root = self.package_folder
         boost_include = os.path.join(boost_root, 'include')
         boost_lib = os.path.join(boost_root, 'lib')
+        if self._multi_config_variants:
+            # The variant matching the build type of the consumer
+            build_type = "Debug" if self.settings.build_type == "Debug" else "Release"
+            link = "shared" if self.options.shared else "static"
+            boost_lib = os.path.join(boost_root, self._multi_config_lib_folder(build_type, link))
 
         self.env_info.BOOST_ROOT = boost_root
         self.env_info.BOOST_INCLUDEDIR = boost_include
         self.env_info.BOOST_LIBRARYDIR = boost_lib
 
-        self.cpp_info.bindirs.append("lib")
+        debug_folder = os.path.join(boost_root, "debug")
+        if os.path.isdir(debug_folder):
+            # e.g. gdb -iex "set debug-file-directory <debug_dir>"
+            self.user_info.debug_dir = debug_folder
+
         self.cpp_info.names["cmake_find_package"] = "Boost"
         self.cpp_info.names["cmake_find_package_multi"] = "Boost"
@@ -0,0 +1,39 @@
+#include "benchmark.hpp"
+
+#include <boost/asio/io_context.hpp>
+#include <boost/asio/post.hpp>
+#include <boost/asio/steady_timer.hpp>
+
+#include <chrono>
+
+static void asio_post(bench::state &state) {
+   boost::asio::io_context io;
+   std::uint64_t handled = 0;
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      boost::asio::post(io, [&handled] { ++handled; });
+   }
+   io.run();
+   bench::do_not_optimize(handled);
+   state.set_items_processed(handled);
+}
+BENCHMARK(asio_post);
+
+// A chain of already expired timers: measures the timer queue and the completion dispatch
+static void asio_timer(bench::state &state) {
+   boost::asio::io_context io;
+   boost::asio::steady_timer timer(io);
+   std::uint64_t remaining = state.iterations();
+   std::function<void(const boost::system::error_code &)> handler = [&](const boost::system::error_code &) {
+      if (--remaining != 0) {
+         timer.expires_after(std::chrono::nanoseconds(0));
+         timer.async_wait(handler);
+      }
+   };
+   timer.expires_after(std::chrono::nanoseconds(0));
+   timer.async_wait(handler);
+   io.run();
+   state.set_items_processed(state.iterations());
+}
+BENCHMARK(asio_timer);
+
+BENCHMARK_MAIN()
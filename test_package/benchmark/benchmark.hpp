@@ -0,0 +1,162 @@
+// Minimal Google-Benchmark-style harness for the test_package benchmarks.
+// Every registered benchmark is run with a growing iteration count until it takes at least --benchmark_min_time
+// seconds, --benchmark_repetitions times. The results are printed and, with --benchmark_out=<file>, written in the
+// Google Benchmark JSON format.
+#pragma once
+
+#include <chrono>
+#include <cstdint>
+#include <cstdlib>
+#include <ctime>
+#include <fstream>
+#include <functional>
+#include <iostream>
+#include <string>
+#include <utility>
+#include <vector>
+
+namespace bench {
+
+class state {
+public:
+   explicit state(std::uint64_t iterations) : iterations_{iterations} {}
+
+   std::uint64_t iterations() const { return iterations_; }
+
+   void set_items_processed(std::uint64_t items) { items_ = items; }
+   void set_bytes_processed(std::uint64_t bytes) { bytes_ = bytes; }
+
+   std::uint64_t items_processed() const { return items_; }
+   std::uint64_t bytes_processed() const { return bytes_; }
+
+private:
+   std::uint64_t iterations_;
+   std::uint64_t items_ = 0;
+   std::uint64_t bytes_ = 0;
+};
+
+using function_t = std::function<void(state &)>;
+
+struct entry {
+   std::string name;
+   function_t function;
+};
+
+inline std::vector<entry> &registry() {
+   static std::vector<entry> benchmarks;
+   return benchmarks;
+}
+
+struct registrar {
+   registrar(const char *name, function_t function) { registry().push_back({name, std::move(function)}); }
+};
+
+template <class T>
+inline void do_not_optimize(T const &value) {
+#if defined(__GNUC__) || defined(__clang__)
+   asm volatile("" : : "r,m"(value) : "memory");
+#else
+   static volatile const void *sink;
+   sink = &value;
+#endif
+}
+
+struct result {
+   std::string name;
+   int repetition;
+   std::uint64_t iterations;
+   double real_ns;
+   double cpu_ns;
+   double items_per_second;
+   double bytes_per_second;
+};
+
+inline result run_once(const entry &benchmark, double min_time, int repetition) {
+   using clock_t = std::chrono::steady_clock;
+
+   std::uint64_t iterations = 1;
+   for (;;) {
+      state st{iterations};
+      const std::clock_t cpu_start = std::clock();
+      const auto start = clock_t::now();
+      benchmark.function(st);
+      const double seconds = std::chrono::duration<double>(clock_t::now() - start).count();
+      const double cpu_seconds = double(std::clock() - cpu_start) / CLOCKS_PER_SEC;
+
+      if (seconds >= min_time || iterations >= (std::uint64_t(1) << 40)) {
+         return {benchmark.name, repetition, iterations,
+                 seconds * 1e9 / iterations, cpu_seconds * 1e9 / iterations,
+                 st.items_processed() / seconds, st.bytes_processed() / seconds};
+      }
+
+      // Aim slightly above the minimum time, growing at most 10x per round like Google Benchmark does
+      const double multiplier = seconds > 0 ? min_time * 1.4 / seconds : 10.0;
+      iterations = std::uint64_t(iterations * (multiplier > 10.0 ? 10.0 : (multiplier < 2.0 ? 2.0 : multiplier)));
+   }
+}
+
+inline void write_json(const std::string &file_name, const std::vector<result> &results, int repetitions) {
+   std::ofstream out(file_name);
+   out << "{\n  \"context\": {},\n  \"benchmarks\": [\n";
+   for (std::size_t i = 0; i < results.size(); ++i) {
+      const result &r = results[i];
+      out << "    {\"name\": \"" << r.name << "\", \"run_name\": \"" << r.name << "\", \"run_type\": \"iteration\", "
+          << "\"repetitions\": " << repetitions << ", \"repetition_index\": " << r.repetition << ", "
+          << "\"iterations\": " << r.iterations << ", \"real_time\": " << r.real_ns << ", "
+          << "\"cpu_time\": " << r.cpu_ns << ", \"time_unit\": \"ns\"";
+      if (r.items_per_second > 0) {
+         out << ", \"items_per_second\": " << r.items_per_second;
+      }
+      if (r.bytes_per_second > 0) {
+         out << ", \"bytes_per_second\": " << r.bytes_per_second;
+      }
+      out << "}" << (i + 1 < results.size() ? "," : "") << "\n";
+   }
+   out << "  ]\n}\n";
+}
+
+inline int main(int argc, char *argv[]) {
+   double min_time = 0.5;
+   int repetitions = 1;
+   std::string out_file;
+
+   for (int i = 1; i < argc; ++i) {
+      const std::string arg{argv[i]};
+      if (arg.rfind("--benchmark_min_time=", 0) == 0) {
+         min_time = std::atof(arg.c_str() + std::string("--benchmark_min_time=").size());
+      } else if (arg.rfind("--benchmark_repetitions=", 0) == 0) {
+         repetitions = std::atoi(arg.c_str() + std::string("--benchmark_repetitions=").size());
+      } else if (arg.rfind("--benchmark_out=", 0) == 0) {
+         out_file = arg.substr(std::string("--benchmark_out=").size());
+      }
+   }
+
+   std::vector<result> results;
+   for (const entry &benchmark : registry()) {
+      for (int repetition = 0; repetition < repetitions; ++repetition) {
+         results.push_back(run_once(benchmark, min_time, repetition));
+         const result &r = results.back();
+         std::cout << r.name << "\t" << r.real_ns << " ns\t" << r.iterations << " iterations";
+         if (r.items_per_second > 0) {
+            std::cout << "\t" << r.items_per_second << " items/s";
+         }
+         if (r.bytes_per_second > 0) {
+            std::cout << "\t" << r.bytes_per_second << " bytes/s";
+         }
+         std::cout << std::endl;
+      }
+   }
+
+   if (!out_file.empty()) {
+      write_json(out_file, results, repetitions);
+   }
+   return 0;
+}
+
+} // namespace bench
+
+#define BENCHMARK_CONCAT_IMPL(a, b) a##b
+#define BENCHMARK_CONCAT(a, b) BENCHMARK_CONCAT_IMPL(a, b)
+#define BENCHMARK(function) static ::bench::registrar BENCHMARK_CONCAT(benchmark_registrar_, __LINE__)(#function, function)
+#define BENCHMARK_MAIN() \
+   int main(int argc, char *argv[]) { return ::bench::main(argc, argv); }
@@ -0,0 +1,20 @@
+#include "benchmark.hpp"
+
+#include <boost/coroutine/all.hpp>
+
+// Every resume of the pull coroutine is a switch into it and a switch back
+static void coroutine_switch(bench::state &state) {
+   using coroutine_t = boost::coroutines::asymmetric_coroutine<void>;
+   coroutine_t::pull_type source([](coroutine_t::push_type &sink) {
+      for (;;) {
+         sink();
+      }
+   });
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      source();
+   }
+   state.set_items_processed(state.iterations() * 2);
+}
+BENCHMARK(coroutine_switch);
+
+BENCHMARK_MAIN()
@@ -0,0 +1,27 @@
+#include "benchmark.hpp"
+
+#include <boost/fiber/all.hpp>
+
+#include <memory>
+
+#ifndef CONAN_BOOST_STACK_ALLOCATOR
+#define CONAN_BOOST_STACK_ALLOCATOR fixedsize_stack
+#endif
+
+// Two fibers yielding to each other: every yield is one context switch
+static void fiber_yield(bench::state &state) {
+   const std::uint64_t iterations = state.iterations();
+   boost::fibers::fiber other(std::allocator_arg, boost::fibers::CONAN_BOOST_STACK_ALLOCATOR(), [iterations] {
+      for (std::uint64_t i = 0; i < iterations; ++i) {
+         boost::this_fiber::yield();
+      }
+   });
+   for (std::uint64_t i = 0; i < iterations; ++i) {
+      boost::this_fiber::yield();
+   }
+   other.join();
+   state.set_items_processed(iterations * 2);
+}
+BENCHMARK(fiber_yield);
+
+BENCHMARK_MAIN()
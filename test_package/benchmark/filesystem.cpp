@@ -0,0 +1,39 @@
+#include "benchmark.hpp"
+
+#include <boost/filesystem.hpp>
+
+#include <string>
+
+namespace fs = boost::filesystem;
+
+// A temporary directory with 1000 files, removed at exit
+struct sample_directory {
+   sample_directory() : path{fs::temp_directory_path() / fs::unique_path("boost-bench-%%%%-%%%%")} {
+      fs::create_directories(path);
+      for (int i = 0; i < 1000; ++i) {
+         fs::ofstream(path / ("file_" + std::to_string(i) + ".txt")) << i;
+      }
+   }
+
+   ~sample_directory() {
+      boost::system::error_code ec;
+      fs::remove_all(path, ec);
+   }
+
+   fs::path path;
+};
+
+static void filesystem_directory_iteration(bench::state &state) {
+   static const sample_directory directory;
+
+   std::uint64_t entries = 0;
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      for (fs::directory_iterator it(directory.path), end; it != end; ++it) {
+         ++entries;
+      }
+   }
+   state.set_items_processed(entries);
+}
+BENCHMARK(filesystem_directory_iteration);
+
+BENCHMARK_MAIN()
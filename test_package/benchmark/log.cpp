@@ -0,0 +1,45 @@
+#include "benchmark.hpp"
+
+#include <boost/log/core.hpp>
+#include <boost/log/expressions.hpp>
+#include <boost/log/sinks/basic_sink_backend.hpp>
+#if defined(BOOST_LOG_NO_THREADS)
+#include <boost/log/sinks/unlocked_frontend.hpp>
+#else
+#include <boost/log/sinks/sync_frontend.hpp>
+#endif
+#include <boost/log/sources/logger.hpp>
+#include <boost/log/sources/record_ostream.hpp>
+
+#include <boost/smart_ptr/make_shared_object.hpp>
+
+namespace logging = boost::log;
+
+// Formats the records like a real sink would, then drops them
+class null_backend : public logging::sinks::basic_formatted_sink_backend<char> {
+public:
+   void consume(const logging::record_view &, const string_type &message) { bench::do_not_optimize(message.size()); }
+};
+
+static void log_null_sink(bench::state &state) {
+#if defined(BOOST_LOG_NO_THREADS)
+   // The synchronous frontend needs the thread support of a multithreaded package
+   using sink_t = logging::sinks::unlocked_sink<null_backend>;
+#else
+   using sink_t = logging::sinks::synchronous_sink<null_backend>;
+#endif
+   auto sink = boost::make_shared<sink_t>();
+   sink->set_formatter(logging::expressions::stream << "[bench] " << logging::expressions::smessage);
+   logging::core::get()->add_sink(sink);
+
+   logging::sources::logger logger;
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      BOOST_LOG(logger) << "record " << i << " with some payload";
+   }
+
+   logging::core::get()->remove_sink(sink);
+   state.set_items_processed(state.iterations());
+}
+BENCHMARK(log_null_sink);
+
+BENCHMARK_MAIN()
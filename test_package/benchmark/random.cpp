@@ -0,0 +1,36 @@
+#include "benchmark.hpp"
+
+#include <boost/random/mersenne_twister.hpp>
+#include <boost/random/normal_distribution.hpp>
+#include <boost/random/uniform_int_distribution.hpp>
+
+static void random_mt19937(bench::state &state) {
+   boost::random::mt19937 engine;
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      bench::do_not_optimize(engine());
+   }
+   state.set_items_processed(state.iterations());
+}
+BENCHMARK(random_mt19937);
+
+static void random_uniform_int(bench::state &state) {
+   boost::random::mt19937 engine;
+   boost::random::uniform_int_distribution<> distribution(0, 1000);
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      bench::do_not_optimize(distribution(engine));
+   }
+   state.set_items_processed(state.iterations());
+}
+BENCHMARK(random_uniform_int);
+
+static void random_normal(bench::state &state) {
+   boost::random::mt19937 engine;
+   boost::random::normal_distribution<> distribution(0.0, 1.0);
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      bench::do_not_optimize(distribution(engine));
+   }
+   state.set_items_processed(state.iterations());
+}
+BENCHMARK(random_normal);
+
+BENCHMARK_MAIN()
@@ -0,0 +1,36 @@
+#include "benchmark.hpp"
+
+#include <boost/regex.hpp>
+
+#include <string>
+
+static void regex_match_subject(bench::state &state) {
+   const boost::regex pattern("^Subject: (Re: |Aw: )*(.*)");
+   const std::string line = "Subject: Re: Aw: Re: quarterly report";
+   boost::smatch matches;
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      const bool matched = boost::regex_match(line, matches, pattern);
+      bench::do_not_optimize(matched);
+   }
+   state.set_items_processed(state.iterations());
+}
+BENCHMARK(regex_match_subject);
+
+static void regex_search_text(bench::state &state) {
+   const boost::regex pattern("[a-z]+@[a-z]+\\.(com|org)");
+   std::string text;
+   while (text.size() < 64 * 1024) {
+      text += "lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor ";
+   }
+   text += "contact: someone@example.org";
+
+   boost::smatch matches;
+   for (std::uint64_t i = 0; i < state.iterations(); ++i) {
+      const bool found = boost::regex_search(text, matches, pattern);
+      bench::do_not_optimize(found);
+   }
+   state.set_bytes_processed(state.iterations() * text.size());
+}
+BENCHMARK(regex_search_text);
+
+BENCHMARK_MAIN()
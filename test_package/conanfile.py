@@ -1,6 +1,14 @@
 from conans import ConanFile, CMake, tools
+from conans.errors import ConanException
+import json
 import os
 import sys
+import time
+
+
+# Options of the boost package recorded with the benchmark results, to tell the package variants apart
+BENCHMARK_CONTEXT_OPTIONS = ["shared", "visibility", "segmented_stacks", "extra_b2_flags", "lto", "pgo", "cpu_target",
+                             "linker", "gc_sections", "icf", "context_impl", "context_stack_allocator"]
 
 
 class DefaultNameConan(ConanFile):
@@ -10,12 +18,124 @@ class DefaultNameConan(ConanFile):
     def with_complex(self):
         return not self.options["boost"].without_filesystem and not self.options["boost"].without_log and not self.options["boost"].without_fiber
 
+    def with_numpy(self):
+        if self.options["boost"].without_python or self.options["boost"].header_only:
+            return False
+        return any("boost_numpy" in file_name
+                   for lib_path in self.deps_cpp_info["boost"].lib_paths for file_name in os.listdir(lib_path))
+
+    def test_numpy(self, module):
+        """
+        Checks that arrays cross the boundary without a copy, and how much faster it is than converting every element
+        """
+        import numpy
+
+        array = numpy.arange(1000000, dtype=numpy.float64)
+        view = module.roundtrip(array)
+        view[0] = -1.0
+        if not numpy.shares_memory(array, view) or array[0] != -1.0:
+            raise ConanException("The ndarray round-trip copied the array")
+
+        values = array.tolist()
+        start = time.perf_counter()
+        array_sum = module.sum_array(array)
+        array_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        list_sum = module.sum_list(values)
+        list_seconds = time.perf_counter() - start
+        if array_sum != list_sum:
+            raise ConanException("sum_array and sum_list disagree: %s != %s" % (array_sum, list_sum))
+
+        self.output.info("NumPy: %.1f M elements/s through the buffer, %.1f M elements/s element-wise (x%.1f)" %
+                         (len(values) / array_seconds / 1e6, len(values) / list_seconds / 1e6,
+                          list_seconds / array_seconds))
+        if array_seconds > list_seconds:
+            raise ConanException("Summing the ndarray buffer is slower than converting the elements")
+
+    def with_stacktrace(self):
+        # Without a backend the package exposes every stacktrace library and the consumers have to pick one
+        return not self.options["boost"].without_stacktrace and self.options["boost"].stacktrace_backend != "default"
+
+    def with_benchmark(self):
+        return tools.get_env("BOOST_BENCHMARK", False) and not self.options["boost"].header_only
+
+    def benchmarks(self):
+        benchmarks = ["asio"]
+        if not self.options["boost"].without_regex:
+            benchmarks.append("regex")
+        if not self.options["boost"].without_random:
+            benchmarks.append("random")
+        if not self.options["boost"].without_coroutine:
+            benchmarks.append("coroutine")
+        if self.with_complex():
+            benchmarks.extend(["fiber", "log", "filesystem"])
+        return benchmarks
+
+    def run_benchmarks(self):
+        """
+        Runs the benchmarks and collects their results, with the package variant they were measured on, in
+        benchmark_results.json
+        """
+        min_time = tools.get_env("BOOST_BENCHMARK_MIN_TIME", "0.5")
+        repetitions = tools.get_env("BOOST_BENCHMARK_REPETITIONS", "5")
+        results = []
+        for benchmark in self.benchmarks():
+            out_file = os.path.join(self.build_folder, "bench_%s.json" % benchmark)
+            self.run("%s --benchmark_min_time=%s --benchmark_repetitions=%s --benchmark_out=%s"
+                     % (os.path.join("bin", "bench_%s" % benchmark), min_time, repetitions, out_file),
+                     run_environment=True)
+            with open(out_file) as f:
+                results.extend(json.load(f)["benchmarks"])
+
+        settings = ["os", "arch", "compiler", "compiler.version", "build_type"]
+        context = {"settings": {name: str(self.settings.get_safe(name)) for name in settings},
+                   "options": {name: str(self.options["boost"].get_safe(name)) for name in BENCHMARK_CONTEXT_OPTIONS}}
+        with open(os.path.join(self.build_folder, "benchmark_results.json"), "w") as f:
+            json.dump({"context": context, "benchmarks": results}, f, indent=2)
+
+    def report_library_sizes(self):
+        """
+        Writes the size of every boost library to library_sizes.json, and prints the delta with the sizes of another
+        package variant given by BOOST_LIBRARY_SIZES_BASELINE
+        """
+        sizes = {}
+        for lib_path in self.deps_cpp_info["boost"].lib_paths:
+            for root, _, files in os.walk(lib_path):
+                for file_name in files:
+                    path = os.path.join(root, file_name)
+                    if "boost_" in file_name and not os.path.islink(path) and not file_name.endswith(".json"):
+                        sizes[file_name] = os.path.getsize(path)
+        with open(os.path.join(self.build_folder, "library_sizes.json"), "w") as f:
+            json.dump(sizes, f, indent=2, sort_keys=True)
+
+        baseline = {}
+        baseline_file = tools.get_env("BOOST_LIBRARY_SIZES_BASELINE")
+        if baseline_file and os.path.isfile(baseline_file):
+            with open(baseline_file) as f:
+                baseline = json.load(f)
+
+        self.output.info("Library sizes:")
+        for name, size in sorted(sizes.items()):
+            line = "  %-50s %10d bytes" % (name, size)
+            if baseline.get(name):
+                line += "  %+.1f%%" % ((size - baseline[name]) * 100.0 / baseline[name])
+            self.output.info(line)
+        total = sum(sizes.values())
+        line = "  %-50s %10d bytes" % ("total", total)
+        baseline_total = sum(size for name, size in baseline.items() if name in sizes)
+        if baseline_total:
+            line += "  %+.1f%%" % ((total - baseline_total) * 100.0 / baseline_total)
+        self.output.info(line)
+
     def build(self):
         cmake = CMake(self)
         if self.options["boost"].header_only:
             cmake.definitions["HEADER_ONLY"] = "TRUE"
         if not self.options["boost"].without_python:
             cmake.definitions["WITH_PYTHON"] = "TRUE"
+        if self.with_numpy():
+            cmake.definitions["WITH_NUMPY"] = "TRUE"
+            cmake.definitions["Python3_EXECUTABLE"] = sys.executable
         if not self.options["boost"].without_random:
             cmake.definitions["WITH_RANDOM"] = "TRUE"
         if not self.options["boost"].without_regex:
@@ -26,19 +146,41 @@ class DefaultNameConan(ConanFile):
             cmake.definitions["WITH_COROUTINE"] = "TRUE"
         if not self.options["boost"].without_chrono:
             cmake.definitions["WITH_CHRONO"] = "TRUE"
+        if self.with_stacktrace():
+            cmake.definitions["WITH_STACKTRACE"] = "TRUE"
+        if not self.options["boost"].without_iostreams:
+            cmake.definitions["WITH_IOSTREAMS"] = "TRUE"
+            if self.options["boost"].iostreams_lzma:
+                cmake.definitions["WITH_LZMA"] = "TRUE"
+            if self.options["boost"].iostreams_zstd:
+                cmake.definitions["WITH_ZSTD"] = "TRUE"
         if self.with_complex():
             cmake.definitions["WITH_COMPLEX"] = "TRUE"
+        if not self.options["boost"].without_fiber:
+            # Built from the trimmed source tree: checks the configuration tests b2 runs for it are still there
+            cmake.definitions["WITH_FIBER"] = "TRUE"
+        if self.with_benchmark():
+            cmake.definitions["WITH_BENCHMARK"] = "TRUE"
+        if self.options["boost"].cpu_target != "generic":
+            cmake.definitions["CPU_TARGET"] = str(self.options["boost"].cpu_target)
 
         cmake.configure()
         cmake.build()
 
     def test(self):
+        if not self.options["boost"].header_only:
+            self.report_library_sizes()
+
         if self.settings.os == 'Emscripten':
             self.run('node %s' % os.path.join("bin", "lambda_exe.js 1 2 3"), run_environment=True)
 
         if tools.cross_building(self.settings):
             return
 
+        if self.options["boost"].cpu_target != "generic":
+            # Fail fast with a clear message instead of crashing on an illegal instruction later
+            self.run(os.path.join("bin", "cpu_target_exe"), run_environment=True)
+
         self.run(os.path.join("bin", "lambda_exe 1 2 3"), run_environment=True)
         if self.options["boost"].header_only:
             return
@@ -53,10 +195,22 @@ class DefaultNameConan(ConanFile):
             self.run(os.path.join("bin", "coroutine_exe"), run_environment=True)
         if not self.options["boost"].without_chrono:
             self.run(os.path.join("bin", "chrono_exe"), run_environment=True)
+        if not self.options["boost"].without_iostreams:
+            self.run(os.path.join("bin", "iostreams_exe"), run_environment=True)
+        if self.with_stacktrace():
+            self.run(os.path.join("bin", "stacktrace_exe"), run_environment=True)
         if self.with_complex():
             self.run(os.path.join("bin", "complex_exe"), run_environment=True)
+        if not self.options["boost"].without_fiber:
+            self.run(os.path.join("bin", "fiber_exe"), run_environment=True)
         if not self.options["boost"].without_python:
             os.chdir("bin")
             sys.path.append(".")
             import hello_ext
             hello_ext.greet()
+            if self.with_numpy():
+                self.test_numpy(hello_ext)
+            os.chdir("..")
+
+        if self.with_benchmark():
+            self.run_benchmarks()
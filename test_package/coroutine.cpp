@@ -1,4 +1,6 @@
 #include <boost/coroutine/all.hpp>
+#include <chrono>
+#include <cstdint>
 #include <iostream>
 
 using namespace boost::coroutines;
@@ -9,9 +11,37 @@ void cooperative(coroutine<void>::push_type &sink) {
   std::cout << "world";
 }
 
+// Every resume of the pull coroutine is a switch into it and a switch back
+void measure_switches() {
+  const std::uint64_t resumes = 1000000;
+  coroutine<void>::pull_type source([](coroutine<void>::push_type &sink) {
+    for (;;) {
+      sink();
+    }
+  });
+
+  auto start = std::chrono::steady_clock::now();
+  for (std::uint64_t i = 0; i < resumes; ++i) {
+    source();
+  }
+  std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+
+#if defined(BOOST_USE_UCONTEXT)
+  const char *backend = "ucontext";
+#elif defined(BOOST_USE_WINFIB)
+  const char *backend = "winfib";
+#else
+  const char *backend = "fcontext";
+#endif
+  std::cout << "coroutine (" << backend << "): " << static_cast<std::uint64_t>(resumes * 2 / elapsed.count())
+            << " switches/s\n";
+}
+
 int main() {
   coroutine<void>::pull_type source(cooperative);
   std::cout << ", ";
   source();
   std::cout << "!\n";
+
+  measure_switches();
 }
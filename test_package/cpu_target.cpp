@@ -0,0 +1,50 @@
+// Fails fast when the CPU running the tests does not support the cpu_target the package was built for.
+// This file is built without the -march flags of the package, so it can run on any CPU of the architecture.
+#include <cstring>
+#include <iostream>
+
+#if defined(__linux__) && defined(__aarch64__)
+#include <sys/auxv.h>
+#endif
+
+#ifndef BOOST_CPU_TARGET
+#define BOOST_CPU_TARGET "generic"
+#endif
+
+static bool supported(const char *target) {
+#if (defined(__GNUC__) || defined(__clang__)) && (defined(__x86_64__) || defined(__i386__))
+   __builtin_cpu_init();
+   const bool v2 = __builtin_cpu_supports("sse4.2") && __builtin_cpu_supports("popcnt") &&
+                   __builtin_cpu_supports("ssse3");
+   const bool v3 = v2 && __builtin_cpu_supports("avx2") && __builtin_cpu_supports("bmi2") &&
+                   __builtin_cpu_supports("fma");
+   const bool v4 = v3 && __builtin_cpu_supports("avx512f") && __builtin_cpu_supports("avx512bw") &&
+                   __builtin_cpu_supports("avx512vl") && __builtin_cpu_supports("avx512dq");
+   if (std::strcmp(target, "x86-64-v2") == 0) return v2;
+   if (std::strcmp(target, "x86-64-v3") == 0) return v3;
+   if (std::strcmp(target, "x86-64-v4") == 0) return v4;
+#elif defined(__linux__) && defined(__aarch64__)
+   const unsigned long hwcaps = getauxval(AT_HWCAP);
+   const unsigned long atomics = 1UL << 8;  // HWCAP_ATOMICS, mandatory from armv8.1-a
+   const unsigned long dcpop = 1UL << 16;   // HWCAP_DCPOP, mandatory from armv8.2-a
+   const unsigned long uscat = 1UL << 25;   // HWCAP_USCAT, mandatory from armv8.4-a
+   const bool v81 = (hwcaps & atomics) != 0;
+   const bool v82 = v81 && (hwcaps & dcpop) != 0;
+   const bool v84 = v82 && (hwcaps & uscat) != 0;
+   if (std::strcmp(target, "armv8.1-a") == 0) return v81;
+   if (std::strcmp(target, "armv8.2-a") == 0) return v82;
+   if (std::strcmp(target, "armv8.4-a") == 0) return v84;
+#endif
+   // generic, native (built on this very machine) or a target that cannot be checked here
+   (void)target;
+   return true;
+}
+
+int main() {
+   if (!supported(BOOST_CPU_TARGET)) {
+      std::cerr << "This CPU does not support the " << BOOST_CPU_TARGET << " target boost was built for" << std::endl;
+      return 1;
+   }
+   std::cout << "CPU supports the " << BOOST_CPU_TARGET << " target" << std::endl;
+   return 0;
+}
@@ -0,0 +1,39 @@
+#include <boost/fiber/all.hpp>
+#include <chrono>
+#include <cstdint>
+#include <iostream>
+#include <memory>
+
+#ifndef CONAN_BOOST_STACK_ALLOCATOR
+#define CONAN_BOOST_STACK_ALLOCATOR fixedsize_stack
+#endif
+
+#define STRINGIFY_(x) #x
+#define STRINGIFY(x) STRINGIFY_(x)
+
+// Two fibers, on stacks of the packaged allocator, yielding to each other: every yield is one context switch
+int main() {
+  const std::uint64_t yields = 1000000;
+  boost::fibers::fiber other(std::allocator_arg, boost::fibers::CONAN_BOOST_STACK_ALLOCATOR(), [yields] {
+    for (std::uint64_t i = 0; i < yields; ++i) {
+      boost::this_fiber::yield();
+    }
+  });
+
+  auto start = std::chrono::steady_clock::now();
+  for (std::uint64_t i = 0; i < yields; ++i) {
+    boost::this_fiber::yield();
+  }
+  other.join();
+  std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+
+#if defined(BOOST_USE_UCONTEXT)
+  const char *backend = "ucontext";
+#elif defined(BOOST_USE_WINFIB)
+  const char *backend = "winfib";
+#else
+  const char *backend = "fcontext";
+#endif
+  std::cout << "fiber (" << backend << ", " << STRINGIFY(CONAN_BOOST_STACK_ALLOCATOR) << "): "
+            << static_cast<std::uint64_t>(yields * 2 / elapsed.count()) << " switches/s\n";
+}
@@ -0,0 +1,86 @@
+#include <boost/iostreams/copy.hpp>
+#include <boost/iostreams/device/array.hpp>
+#include <boost/iostreams/device/back_inserter.hpp>
+#include <boost/iostreams/filter/bzip2.hpp>
+#include <boost/iostreams/filter/gzip.hpp>
+#include <boost/iostreams/filtering_stream.hpp>
+#ifdef WITH_LZMA
+#include <boost/iostreams/filter/lzma.hpp>
+#endif
+#ifdef WITH_ZSTD
+#include <boost/iostreams/filter/zstd.hpp>
+#endif
+
+#include <chrono>
+#include <cstdint>
+#include <iostream>
+#include <random>
+#include <string>
+#include <vector>
+
+namespace io = boost::iostreams;
+
+// Log-like lines: repeated structure with varying numbers, which is what our pipelines compress
+std::string make_corpus(std::size_t size) {
+  static const char *levels[] = {"DEBUG", "INFO", "WARNING", "ERROR"};
+  static const char *components[] = {"scheduler", "storage", "network", "cache", "auth"};
+  std::mt19937 generator(42);
+  std::string corpus;
+  corpus.reserve(size + 256);
+  while (corpus.size() < size) {
+    corpus += "2021-01-" + std::to_string(1 + generator() % 28) + " " + levels[generator() % 4] + " [" +
+              components[generator() % 5] + "] request " + std::to_string(generator() % 100000) +
+              " completed in " + std::to_string(generator() % 5000) + "us status=" +
+              std::to_string(200 + generator() % 4 * 100) + "\n";
+  }
+  return corpus;
+}
+
+template <typename Compressor, typename Decompressor>
+bool measure(const char *name, const std::string &corpus, Compressor compressor, Decompressor decompressor) {
+  using clock = std::chrono::steady_clock;
+
+  std::vector<char> compressed;
+  auto start = clock::now();
+  {
+    io::filtering_ostream out;
+    out.push(compressor);
+    out.push(io::back_inserter(compressed));
+    out.write(corpus.data(), corpus.size());
+  }
+  std::chrono::duration<double> compress_time = clock::now() - start;
+
+  std::string restored;
+  start = clock::now();
+  {
+    io::filtering_istream in;
+    in.push(decompressor);
+    in.push(io::array_source(compressed.data(), compressed.size()));
+    io::copy(in, io::back_inserter(restored));
+  }
+  std::chrono::duration<double> decompress_time = clock::now() - start;
+
+  const double megabytes = corpus.size() / 1e6;
+  std::cout << name << ": ratio " << static_cast<double>(corpus.size()) / compressed.size() << ", compress "
+            << megabytes / compress_time.count() << " MB/s, decompress " << megabytes / decompress_time.count()
+            << " MB/s\n";
+  if (restored != corpus) {
+    std::cerr << name << ": the round-trip does not restore the corpus\n";
+    return false;
+  }
+  return true;
+}
+
+int main() {
+  const std::string corpus = make_corpus(8 * 1024 * 1024);
+  bool ok = true;
+  ok &= measure("gzip", corpus, io::gzip_compressor(), io::gzip_decompressor());
+  ok &= measure("bzip2", corpus, io::bzip2_compressor(), io::bzip2_decompressor());
+#ifdef WITH_LZMA
+  ok &= measure("lzma", corpus, io::lzma_compressor(), io::lzma_decompressor());
+#endif
+#ifdef WITH_ZSTD
+  ok &= measure("zstd", corpus, io::zstd_compressor(), io::zstd_decompressor());
+#endif
+  return ok ? 0 : 1;
+}
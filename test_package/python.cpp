@@ -1,12 +1,65 @@
 #include <boost/python.hpp>
 
+#ifdef WITH_NUMPY
+#include <boost/python/numpy.hpp>
+
+#include <stdexcept>
+#include <vector>
+#endif
+
 char const* greet()
 {
    return "hello, world!!!!!";
 }
 
+#ifdef WITH_NUMPY
+namespace np = boost::python::numpy;
+
+// A new array viewing the buffer of the given one, which it keeps alive: no element is copied either way
+np::ndarray roundtrip(np::ndarray const& array)
+{
+    std::vector<Py_intptr_t> shape(array.get_shape(), array.get_shape() + array.get_nd());
+    std::vector<Py_intptr_t> strides(array.get_strides(), array.get_strides() + array.get_nd());
+    return np::from_data(array.get_data(), array.get_dtype(), shape, strides, array);
+}
+
+// Sums a contiguous float64 array straight from its buffer
+double sum_array(np::ndarray const& array)
+{
+    if (!np::equivalent(array.get_dtype(), np::dtype::get_builtin<double>()) ||
+        !(array.get_flags() & np::ndarray::C_CONTIGUOUS))
+        throw std::invalid_argument("sum_array expects a contiguous float64 array");
+
+    double const* data = reinterpret_cast<double const*>(array.get_data());
+    Py_intptr_t size = 1;
+    for (int i = 0; i < array.get_nd(); ++i)
+        size *= array.shape(i);
+
+    double sum = 0;
+    for (Py_intptr_t i = 0; i < size; ++i)
+        sum += data[i];
+    return sum;
+}
+
+// The same sum converting every element of a list from a Python object
+double sum_list(boost::python::list const& values)
+{
+    double sum = 0;
+    for (boost::python::ssize_t i = 0, n = boost::python::len(values); i < n; ++i)
+        sum += boost::python::extract<double>(values[i]);
+    return sum;
+}
+#endif
+
 BOOST_PYTHON_MODULE(hello_ext)
 {
     using namespace boost::python;
     def("greet", greet);
+
+#ifdef WITH_NUMPY
+    np::initialize();
+    def("roundtrip", roundtrip);
+    def("sum_array", sum_array);
+    def("sum_list", sum_list);
+#endif
 }
@@ -0,0 +1,51 @@
+#include <boost/config.hpp>
+#include <boost/stacktrace.hpp>
+
+#include <chrono>
+#include <cstddef>
+#include <iostream>
+#include <string>
+
+#if defined(BOOST_STACKTRACE_USE_BACKTRACE)
+static const char *backend = "backtrace";
+#elif defined(BOOST_STACKTRACE_USE_ADDR2LINE)
+static const char *backend = "addr2line";
+#elif defined(BOOST_STACKTRACE_USE_NOOP)
+static const char *backend = "noop";
+#else
+static const char *backend = "basic";
+#endif
+
+const int depth = 64;
+const int captures = 20;
+
+// Not inlined, so every level is a frame of the captured stack
+BOOST_NOINLINE std::size_t capture(int level, bool symbolize) {
+  if (level > 0) {
+    return capture(level - 1, symbolize) + 1;
+  }
+  boost::stacktrace::stacktrace trace;
+  return symbolize ? boost::stacktrace::to_string(trace).size() : trace.size();
+}
+
+double average_microseconds(bool symbolize) {
+  auto start = std::chrono::steady_clock::now();
+  std::size_t result = 0;
+  for (int i = 0; i < captures; ++i) {
+    result += capture(depth, symbolize);
+  }
+  std::chrono::duration<double, std::micro> elapsed = std::chrono::steady_clock::now() - start;
+  if (result == 0) {
+    std::cout << "empty stack traces\n";
+  }
+  return elapsed.count() / captures;
+}
+
+int main() {
+  std::string trace = boost::stacktrace::to_string(boost::stacktrace::stacktrace());
+  std::cout << trace.substr(0, trace.find('\n')) << "\n";
+
+  std::cout << "stacktrace (" << backend << "), " << depth << " frames deep: capture "
+            << average_microseconds(false) << " us, capture and symbolization " << average_microseconds(true)
+            << " us\n";
+}